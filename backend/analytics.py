@@ -0,0 +1,163 @@
+import calendar
+from collections import defaultdict
+from datetime import date, datetime
+from itertools import accumulate
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import Month, Purchase, ShopItem
+
+UNCATEGORIZED = "uncategorized"
+
+MONTH_COLUMNS = (
+    Month.id,
+    Month.year,
+    Month.month,
+    Month.income,
+    Month.ratio,
+    Month.savings_planned,
+    Month.psp_total,
+    Month.cash_spent,
+    Month.exp_earned,
+    Month.exp_redeemed,
+    Month.savings_actual,
+)
+
+
+def _columns(result) -> Dict[str, tuple]:
+    # Transpose row tuples into one tuple per column.
+    keys = list(result.keys())
+    rows = result.all()
+    if not rows:
+        return {key: () for key in keys}
+    return dict(zip(keys, zip(*rows)))
+
+
+def _month_columns(db: Session, user_id: int, limit: Optional[int]) -> Dict[str, tuple]:
+    query = select(*MONTH_COLUMNS).where(Month.user_id == user_id).order_by(Month.year.desc(), Month.month.desc())
+    if limit:
+        query = query.limit(limit)
+    columns = _columns(db.execute(query))
+    return {key: values[::-1] for key, values in columns.items()}
+
+
+def _purchase_totals(db: Session, user_id: int, month_ids: tuple, limited: bool) -> Dict[str, tuple]:
+    # Aggregated in the database off ix_purchases_history; Python only sees one row per
+    # (month, item), and categories are mapped from the user's (small) shop item table.
+    query = (
+        select(
+            Purchase.month_id,
+            Purchase.item_id,
+            func.count().label("purchases"),
+            func.sum(Purchase.cash_spent).label("cash"),
+            func.sum(Purchase.exp_spent).label("exp"),
+        )
+        .where(Purchase.user_id == user_id)
+        .group_by(Purchase.month_id, Purchase.item_id)
+    )
+    if limited:
+        query = query.where(Purchase.month_id.in_(month_ids))
+    totals = _columns(db.execute(query))
+    categories = dict(db.execute(select(ShopItem.id, ShopItem.category).where(ShopItem.user_id == user_id)).all())
+    totals["category"] = tuple(categories.get(item_id) or UNCATEGORIZED for item_id in totals["item_id"])
+    return totals
+
+
+def _elapsed_days(year: int, month: int, today: date) -> int:
+    if (year, month) > (today.year, today.month):
+        return 0
+    if (year, month) == (today.year, today.month):
+        return today.day
+    return calendar.monthrange(year, month)[1]
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return round(numerator / denominator, 4) if denominator else 0.0
+
+
+def build_history(db: Session, user_id: int, months: Optional[int] = None) -> Dict:
+    today = datetime.utcnow().date()
+    m = _month_columns(db, user_id, months)
+    p = _purchase_totals(db, user_id, m["id"], limited=bool(months))
+
+    ratio = [r if r > 0 else 1.0 for r in m["ratio"]]
+    unlocked = [min(earned * r, psp) for earned, r, psp in zip(m["exp_earned"], ratio, m["psp_total"])]
+    rollover = [max(psp - u, 0.0) for psp, u in zip(m["psp_total"], unlocked)]
+    # Closed months carry the recorded savings; open ones use the same projection as compute_month_state.
+    savings = [
+        actual or planned + carried
+        for actual, planned, carried in zip(m["savings_actual"], m["savings_planned"], rollover)
+    ]
+    days = [_elapsed_days(y, mo, today) for y, mo in zip(m["year"], m["month"])]
+
+    index = {month_id: i for i, month_id in enumerate(m["id"])}
+    by_month: List[Dict[str, float]] = [{} for _ in index]
+    purchases_by_month = [0] * len(index)
+    totals_by_category: Dict[str, Dict[str, float]] = defaultdict(lambda: {"cash": 0.0, "exp": 0.0, "purchases": 0})
+    for month_id, category, count, cash, exp in zip(
+        p["month_id"], p["category"], p["purchases"], p["cash"], p["exp"]
+    ):
+        totals = totals_by_category[category]
+        totals["cash"] += cash
+        totals["exp"] += exp
+        totals["purchases"] += count
+        i = index.get(month_id)
+        if i is not None:
+            by_month[i][category] = by_month[i].get(category, 0.0) + cash
+            purchases_by_month[i] += count
+
+    cumulative_savings = [round(total, 2) for total in accumulate(savings)]
+    history = [
+        {
+            "year": m["year"][i],
+            "month": m["month"][i],
+            "income": m["income"][i],
+            "savings": round(savings[i], 2),
+            "savings_rate": _ratio(savings[i], m["income"][i]),
+            "cumulative_savings": cumulative_savings[i],
+            "rollover": round(rollover[i], 2),
+            "cash_spent": round(m["cash_spent"][i], 2),
+            "exp_earned": m["exp_earned"][i],
+            "exp_redeemed": m["exp_redeemed"][i],
+            "exp_earned_per_day": _ratio(m["exp_earned"][i], days[i]),
+            "exp_redeemed_per_day": _ratio(m["exp_redeemed"][i], days[i]),
+            "purchases": purchases_by_month[i],
+            "spend_by_category": {category: round(cash, 2) for category, cash in by_month[i].items()},
+        }
+        for i in range(len(index))
+    ]
+
+    total_income = sum(m["income"])
+    total_savings = sum(savings)
+    total_days = sum(days)
+    return {
+        "months": history,
+        "totals": {
+            "months": len(history),
+            "income": round(total_income, 2),
+            "savings": round(total_savings, 2),
+            "savings_rate": _ratio(total_savings, total_income),
+            "rollover": round(sum(rollover), 2),
+            "cash_spent": round(sum(m["cash_spent"]), 2),
+            "exp_earned": round(sum(m["exp_earned"]), 2),
+            "exp_redeemed": round(sum(m["exp_redeemed"]), 2),
+            "exp_earned_per_day": _ratio(sum(m["exp_earned"]), total_days),
+            "exp_redeemed_per_day": _ratio(sum(m["exp_redeemed"]), total_days),
+            "purchases": sum(purchases_by_month),
+            "spend_by_category": {
+                category: {
+                    "cash": round(totals["cash"], 2),
+                    "exp": round(totals["exp"], 2),
+                    "purchases": totals["purchases"],
+                }
+                for category, totals in sorted(totals_by_category.items())
+            },
+        },
+    }
+
+
+async def build_history_async(db: AsyncSession, user_id: int, months: Optional[int] = None) -> Dict:
+    return await db.run_sync(build_history, user_id, months)
@@ -1,28 +1,146 @@
+import asyncio
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from .db import get_db
+from .db import get_async_db
 from .models import User
+from .ttl_cache import TTLCache
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 bearer_scheme = HTTPBearer()
 
 
-def hash_password(password: str) -> str:
+def _truncate(password: str) -> str:
+    # bcrypt only looks at the first 72 bytes.
     pwd_bytes = password.encode("utf-8")[:72]
-    return pwd_context.hash(pwd_bytes.decode("utf-8", errors="ignore"))
+    return pwd_bytes.decode("utf-8", errors="ignore")
 
 
+def hash_password(password: str) -> str:
+    return pwd_context.hash(_truncate(password))
+
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+    return pwd_context.verify(_truncate(password), password_hash)
+
+
+def _needs_rehash(password_hash: str) -> bool:
+    try:
+        cost = int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return cost != BCRYPT_ROUNDS or pwd_context.needs_update(password_hash)
+
+
+def _verify_and_rehash(password: str, password_hash: str) -> tuple[bool, Optional[str]]:
+    if not verify_password(password, password_hash):
+        return False, None
+    if _needs_rehash(password_hash):
+        return True, hash_password(password)
+    return True, None
+
+
+class _HashPool:
+    # bcrypt is CPU-bound, so it runs in worker processes; a depth limit turns overload into 503s.
+    # Workers are spawned rather than forked so they never inherit the event loop, open
+    # database connections or locks held by other threads at fork time.
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor_locked(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _acquire(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication is busy, please retry shortly.",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+            return self._executor_locked()
+
+    def _release(self) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    def _replace(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        # Concurrent callers all see the same broken pool; only the first one rebuilds it.
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+            executor = self._executor_locked()
+        broken.shutdown(wait=False, cancel_futures=True)
+        return executor
+
+    async def run(self, fn, *args):
+        executor = self._acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            try:
+                return await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                # A worker died (OOM kill, segfault); retry once on a fresh pool.
+                return await loop.run_in_executor(self._replace(executor), fn, *args)
+        finally:
+            self._release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+hash_pool = _HashPool(
+    workers=int(os.getenv("AUTH_HASH_WORKERS", str(min(os.cpu_count() or 1, 4)))),
+    max_pending=int(os.getenv("AUTH_HASH_MAX_PENDING", "64")),
+)
+
+
+async def hash_password_async(password: str) -> str:
+    return await hash_pool.run(hash_password, password)
+
+
+# Returns (ok, new_hash); new_hash is set when the stored cost differs from BCRYPT_ROUNDS.
+async def verify_password_async(password: str, password_hash: str) -> tuple[bool, Optional[str]]:
+    return await hash_pool.run(_verify_and_rehash, password, password_hash)
+
+
+class CurrentUser(NamedTuple):
+    id: int
+    email: str
+
+
+# Sits in front of get_current_user's users lookup.
+user_cache: TTLCache[int, CurrentUser] = TTLCache(
+    max_size=int(os.getenv("AUTH_USER_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("AUTH_USER_CACHE_TTL", "300")),
+)
 
 
 def _jwt_secret() -> str:
@@ -36,24 +154,45 @@ def create_access_token(data: dict, expires_minutes: int = 60 * 24 * 7) -> str:
     return jwt.encode(to_encode, _jwt_secret(), algorithm="HS256")
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    token = credentials.credentials
-    credentials_error = HTTPException(
+def _credentials_error() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode_token(credentials: HTTPAuthorizationCredentials) -> tuple[int, dict]:
     try:
-        payload = jwt.decode(token, _jwt_secret(), algorithms=["HS256"])
+        payload = jwt.decode(credentials.credentials, _jwt_secret(), algorithms=["HS256"])
         user_id = payload.get("sub")
         if user_id is None:
-            raise credentials_error
-    except JWTError as exc:
-        raise credentials_error from exc
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if not user:
-        raise credentials_error
+            raise _credentials_error()
+        return int(user_id), payload
+    except (JWTError, ValueError) as exc:
+        raise _credentials_error() from exc
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> CurrentUser:
+    user_id, _payload = _decode_token(credentials)
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    row = (await db.execute(select(User.id, User.email).where(User.id == user_id))).first()
+    if not row:
+        raise _credentials_error()
+    user = CurrentUser(id=row.id, email=row.email)
+    user_cache.put(user.id, user)
     return user
+
+
+async def get_current_user_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> CurrentUser:
+    # For hot read-only routes that only filter by user id: the signature and expiry are
+    # checked, the users table is not. Routes that write keep using get_current_user.
+    user_id, payload = _decode_token(credentials)
+    return CurrentUser(id=user_id, email=payload.get("email", ""))
@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+from fastapi import Depends, Query
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .. import main as api, responses
+from ..auth import CurrentUser, get_current_user, get_current_user_claims
+from ..db import Base, create_async_db_engine, create_db_engine, get_async_db
+from ..models import TaskInstance, TaskTemplate, User
+from ..schemas import TaskInstanceOut
+
+BENCH_DATE = "2024-01-15"
+
+
+def _seed(url: str, rows: int) -> int:
+    engine = create_db_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        user_id = conn.execute(insert(User).values(email="bench@example.com", password_hash="x")).inserted_primary_key[0]
+        conn.execute(
+            insert(TaskTemplate),
+            [
+                {
+                    "user_id": user_id,
+                    "title": f"Task {i}",
+                    "category": "chores",
+                    "difficulty": ("easy", "med", "hard")[i % 3],
+                    "exp_value": (5, 10, 20)[i % 3],
+                    "schedule_type": "daily",
+                }
+                for i in range(rows)
+            ],
+        )
+        template_ids = conn.scalars(select(TaskTemplate.id).where(TaskTemplate.user_id == user_id)).all()
+        completed_at = datetime(2024, 1, 15, 12, 30)
+        conn.execute(
+            insert(TaskInstance),
+            [
+                {
+                    "user_id": user_id,
+                    "template_id": template_id,
+                    "date": BENCH_DATE,
+                    "status": "completed" if i % 2 else "pending",
+                    "completion_note": "done" if i % 2 else None,
+                    "completed_at": completed_at if i % 2 else None,
+                }
+                for i, template_id in enumerate(template_ids)
+            ],
+        )
+    engine.dispose()
+    return user_id
+
+
+# The pre-projection implementation: ORM entities, one TaskInstanceOut per row, response_model validation.
+@api.app.get("/bench/instances_model", response_model=list[TaskInstanceOut], include_in_schema=False)
+async def _instances_model(
+    date: str = Query(...),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    query = (
+        select(TaskInstance, TaskTemplate)
+        .join(TaskTemplate, TaskInstance.template_id == TaskTemplate.id)
+        .where(TaskInstance.user_id == user.id, TaskInstance.date == date)
+        .order_by(TaskInstance.id)
+    )
+    return [
+        TaskInstanceOut(
+            id=instance.id,
+            template_id=instance.template_id,
+            date=instance.date,
+            status=instance.status,
+            completion_note=instance.completion_note,
+            completed_at=instance.completed_at,
+            title=template.title,
+            category=template.category,
+            difficulty=template.difficulty,
+            exp_value=template.exp_value,
+        )
+        for instance, template in (await db.execute(query)).all()
+    ]
+
+
+async def _measure(client: httpx.AsyncClient, path: str, params: dict, requests: int) -> dict:
+    await client.get(path, params=params)  # warm-up
+    started = time.perf_counter()
+    size = 0
+    for _ in range(requests):
+        resp = await client.get(path, params=params)
+        resp.raise_for_status()
+        size = len(resp.content)
+    elapsed = time.perf_counter() - started
+    return {"req_per_s": round(requests / elapsed, 1), "ms_per_req": round(1000 * elapsed / requests, 2), "bytes": size}
+
+
+async def _run(rows: int, requests: int) -> list:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        user_id = _seed(url, rows)
+        async_engine = create_async_db_engine(url)
+        sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+        async def bench_db():
+            async with sessions() as db:
+                yield db
+
+        api.app.dependency_overrides[get_async_db] = bench_db
+        bench_user = CurrentUser(user_id, "bench@example.com")
+        api.app.dependency_overrides[get_current_user] = lambda: bench_user
+        api.app.dependency_overrides[get_current_user_claims] = lambda: bench_user
+        orjson = responses.orjson
+        params = {"date": BENCH_DATE, "limit": min(rows, api.MAX_PAGE_LIMIT)}
+        results = []
+        try:
+            transport = httpx.ASGITransport(app=api.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                results.append({"variant": "model_per_row", **await _measure(client, "/bench/instances_model", params, requests)})
+                responses.orjson = None
+                results.append({"variant": "rows_stdlib_json", **await _measure(client, "/tasks/instances", params, requests)})
+                if orjson is not None:
+                    responses.orjson = orjson
+                    results.append({"variant": "rows_orjson", **await _measure(client, "/tasks/instances", params, requests)})
+        finally:
+            responses.orjson = orjson
+            api.app.dependency_overrides.clear()
+            await async_engine.dispose()
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Requests/sec of /tasks/instances by serialization path.")
+    parser.add_argument("--rows", type=int, default=1000, help="Task instances on the benchmarked date.")
+    parser.add_argument("--requests", type=int, default=200, help="Sequential requests per variant.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = asyncio.run(_run(args.rows, args.requests))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    baseline = results[0]["req_per_s"]
+    print(f"/tasks/instances, {args.rows} rows, {args.requests} requests per variant")
+    for row in results:
+        print(
+            f"  {row['variant']:<18} {row['req_per_s']:>8} req/s  {row['ms_per_req']:>7} ms/req  "
+            f"{row['bytes']:>7} bytes  ({row['req_per_s'] / baseline:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
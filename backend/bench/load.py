@@ -0,0 +1,411 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+# backend.db builds its engines from DATABASE_URL at import time, so backend modules are
+# imported inside the functions below, after main() has pointed the environment at the bench DB.
+
+PASSWORD = "bench-password"
+COMPLETION_NOTE = "bench run completion"
+FLOWS = ("login", "generate", "list_instances", "complete", "purchase", "month_state", "chat")
+
+
+def _stub_gemini(latency_ms: float) -> Starlette:
+    async def generate(request):
+        await asyncio.sleep(latency_ms / 1000)
+        if request.url.path.endswith(":streamGenerateContent"):
+            async def events():
+                for word in ("Keep ", "a ", "buffer."):
+                    payload = {"candidates": [{"content": {"parts": [{"text": word}]}}]}
+                    yield f"data: {json.dumps(payload)}\r\n\r\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+        text = "You have cash available; consider keeping a buffer before buying."
+        return JSONResponse({"candidates": [{"content": {"parts": [{"text": text}]}}]})
+
+    return Starlette(routes=[Route("/{path:path}", generate, methods=["POST"])])
+
+
+def _start_stub_gemini(latency_ms: float) -> uvicorn.Server:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(_stub_gemini(latency_ms), port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.02)
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{port}/v1beta/models/stub"
+    os.environ["GEMINI_API_KEY"] = "bench"
+    return server
+
+
+def _months_back(today, count: int) -> List[tuple]:
+    year, month = today.year, today.month
+    out = []
+    for _ in range(count):
+        out.append((year, month))
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return out[::-1]
+
+
+def seed(args) -> None:
+    from sqlalchemy import insert, select
+
+    from ..auth import hash_password
+    from ..db import engine
+    from ..migrations import upgrade
+    from ..models import Month, Purchase, Settings, ShopItem, TaskInstance, TaskTemplate, User
+
+    upgrade(engine)
+    rng = random.Random(args.seed)
+    today = datetime.utcnow().date()
+    password_hash = hash_password(PASSWORD)
+    periods = _months_back(today, args.months)
+    history_days = [today - timedelta(days=offset) for offset in range(1, 30 * (args.months - 1) + 1)]
+
+    with engine.begin() as conn:
+        first = conn.scalar(select(User.id).order_by(User.id.desc()).limit(1)) or 0
+        conn.execute(
+            insert(User),
+            [{"email": f"bench{first + i}@example.com", "password_hash": password_hash} for i in range(args.users)],
+        )
+        user_ids = list(conn.scalars(select(User.id).where(User.id > first).order_by(User.id)))
+        conn.execute(insert(Settings), [{"user_id": user_id} for user_id in user_ids])
+        for user_id in user_ids:
+            conn.execute(
+                insert(TaskTemplate),
+                [
+                    {
+                        "user_id": user_id,
+                        "title": f"Task {i}",
+                        "category": ("chores", "health", "work")[i % 3],
+                        "difficulty": ("easy", "med", "hard")[i % 3],
+                        "exp_value": (5, 10, 20)[i % 3],
+                        "schedule_type": "daily",
+                    }
+                    for i in range(args.templates)
+                ],
+            )
+            conn.execute(
+                insert(ShopItem),
+                [
+                    {
+                        "user_id": user_id,
+                        "name": f"Treat {i}",
+                        "tier": 100,
+                        "exp_cost": 10,
+                        "cash_price": round(rng.uniform(1, 5), 2),
+                        "category": ("fun", "food", "tech")[i % 3],
+                    }
+                    for i in range(args.items)
+                ],
+            )
+            month_ids = []
+            for year, month in periods:
+                current = (year, month) == (today.year, today.month)
+                # The open month is funded generously so purchase requests keep succeeding.
+                income = 100000.0 if current else 3000.0
+                month_ids.append(
+                    conn.execute(
+                        insert(Month).values(
+                            user_id=user_id,
+                            year=year,
+                            month=month,
+                            income=income,
+                            ratio=1.0,
+                            needs_planned=income * 0.5,
+                            savings_planned=income * 0.3,
+                            psp_total=income * 0.2,
+                            cash_spent=0.0,
+                            exp_earned=income * 0.2 if current else rng.uniform(100, 600),
+                            exp_redeemed=0.0,
+                            savings_actual=0.0,
+                            closed_at=None if current else datetime.utcnow(),
+                        )
+                    ).inserted_primary_key[0]
+                )
+            template_ids = list(conn.scalars(select(TaskTemplate.id).where(TaskTemplate.user_id == user_id)))
+            item_ids = list(conn.scalars(select(ShopItem.id).where(ShopItem.user_id == user_id)))
+            if history_days:
+                conn.execute(
+                    insert(TaskInstance),
+                    [
+                        {
+                            "user_id": user_id,
+                            "template_id": template_id,
+                            "date": day.isoformat(),
+                            "status": "completed" if rng.random() < 0.7 else "skipped",
+                            "completed_at": datetime.combine(day, datetime.min.time()),
+                        }
+                        for day in history_days
+                        for template_id in template_ids
+                    ],
+                )
+            if args.purchases and item_ids:
+                conn.execute(
+                    insert(Purchase),
+                    [
+                        {
+                            "user_id": user_id,
+                            "month_id": rng.choice(month_ids[:-1] or month_ids),
+                            "item_id": rng.choice(item_ids),
+                            "exp_spent": 10.0,
+                            "cash_spent": round(rng.uniform(1, 5), 2),
+                        }
+                        for _ in range(args.purchases)
+                    ],
+                )
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class BenchUser:
+    def __init__(self, email: str, token: str):
+        self.email = email
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.pending: List[int] = []
+        self.item_ids: List[int] = []
+
+
+async def _run_flow(
+    call: Callable[[BenchUser], Awaitable[Optional[httpx.Response]]], users: List[BenchUser], args
+) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = args.requests
+    cursor = 0
+
+    async def worker() -> None:
+        nonlocal remaining, errors, cursor
+        while remaining > 0:
+            remaining -= 1
+            user = users[cursor % len(users)]
+            cursor += 1
+            started = time.perf_counter()
+            resp = await call(user)
+            if resp is None:
+                # The flow ran out of work; stop instead of timing requests that must fail.
+                remaining = 0
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+            if resp.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2) if latencies else 0.0,
+    }
+
+
+async def run_load(args) -> Dict[str, Dict]:
+    from sqlalchemy import select
+
+    from .. import main as api
+    from ..db import SessionLocal
+    from ..models import User
+
+    rng = random.Random(args.seed)
+    today = datetime.utcnow().date().isoformat()
+    db = SessionLocal()
+    try:
+        emails = list(db.scalars(select(User.email).where(User.email.like("bench%@example.com")).limit(args.active_users)))
+    finally:
+        db.close()
+    if not emails:
+        raise SystemExit("No bench users found; run without --skip-seed first.")
+
+    results: Dict[str, Dict] = {}
+    async with api.app.router.lifespan_context(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            users = []
+            for email in emails:
+                resp = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+                resp.raise_for_status()
+                users.append(BenchUser(email, resp.json()["access_token"]))
+
+            async def login(user: BenchUser) -> httpx.Response:
+                return await client.post("/auth/login", json={"email": user.email, "password": PASSWORD})
+
+            async def generate(user: BenchUser) -> httpx.Response:
+                return await client.post("/tasks/generate", params={"date": today}, headers=user.headers)
+
+            async def list_instances(user: BenchUser) -> httpx.Response:
+                return await client.get("/tasks/instances", params={"date": today}, headers=user.headers)
+
+            async def complete(user: BenchUser) -> Optional[httpx.Response]:
+                # Users run out of pending instances at different times; take work from any
+                # user that has some left, and end the flow once none does.
+                owner = user if user.pending else next((other for other in users if other.pending), None)
+                if owner is None:
+                    return None
+                instance_id = owner.pending.pop()
+                return await client.post(
+                    f"/tasks/instances/{instance_id}/complete", json={"note": COMPLETION_NOTE}, headers=owner.headers
+                )
+
+            async def purchase(user: BenchUser) -> httpx.Response:
+                return await client.post(f"/shop/purchase/{rng.choice(user.item_ids)}", headers=user.headers)
+
+            async def month_state(user: BenchUser) -> httpx.Response:
+                return await client.get("/month/state", headers=user.headers)
+
+            async def chat(user: BenchUser) -> httpx.Response:
+                return await client.post(
+                    "/chat/message", json={"message": "Can I afford a treat this week?"}, headers=user.headers
+                )
+
+            flows = {
+                "login": login,
+                "generate": generate,
+                "list_instances": list_instances,
+                "complete": complete,
+                "purchase": purchase,
+                "month_state": month_state,
+                "chat": chat,
+            }
+            for name in args.flows:
+                if name == "complete":
+                    for user in users:
+                        resp = await client.get(
+                            "/tasks/instances", params={"date": today, "status": "pending"}, headers=user.headers
+                        )
+                        user.pending = [row["id"] for row in resp.json()]
+                if name == "purchase":
+                    for user in users:
+                        resp = await client.get("/shop/items", params={"fields": "id"}, headers=user.headers)
+                        user.item_ids = [row["id"] for row in resp.json()]
+                results[name] = await _run_flow(flows[name], users, args)
+                print(_format_row(name, results[name]), flush=True)
+    return results
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _format_row(name: str, row: Dict) -> str:
+    return (
+        f"  {name:<15} {row['throughput_rps']:>8} req/s  p50 {row['p50_ms']:>8} ms  "
+        f"p95 {row['p95_ms']:>8} ms  p99 {row['p99_ms']:>8} ms  errors {row['errors']}"
+    )
+
+
+def _compare(baseline_path: str, results: Dict[str, Dict]) -> None:
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)["flows"]
+    print(f"vs {baseline_path}")
+    for name, row in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        deltas = []
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            change = 100 * (row[key] - old[key]) / old[key] if old[key] else 0.0
+            deltas.append(f"{key} {change:+6.1f}%")
+        print(f"  {name:<15} " + "  ".join(deltas))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed a synthetic database and load-test the key API flows.")
+    parser.add_argument("--db", default="bench.db", help="SQLite file to seed and test against.")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded --db.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--templates", type=int, default=8, help="Daily templates per user.")
+    parser.add_argument("--items", type=int, default=6, help="Shop items per user.")
+    parser.add_argument("--months", type=int, default=3, help="Months of history, including the current one.")
+    parser.add_argument("--purchases", type=int, default=40, help="Historical purchases per user.")
+    parser.add_argument("--active-users", type=int, default=20, help="Users the load is spread across.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per flow.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--flows", default=",".join(FLOWS), help=f"Comma-separated subset of {','.join(FLOWS)}.")
+    parser.add_argument("--gemini-latency-ms", type=float, default=100.0, help="Stub Gemini response delay.")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed for reproducible data.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--compare", help="Previous results JSON to print deltas against.")
+    args = parser.parse_args()
+    args.flows = [name.strip() for name in args.flows.split(",") if name.strip()]
+    unknown = sorted(set(args.flows) - set(FLOWS))
+    if unknown:
+        parser.error(f"unknown flows: {', '.join(unknown)}")
+
+    if not args.skip_seed and os.path.exists(args.db):
+        os.remove(args.db)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.setdefault("DB_AUTO_MIGRATE", "1")
+    stub = _start_stub_gemini(args.gemini_latency_ms)
+
+    if not args.skip_seed:
+        started = time.perf_counter()
+        seed(args)
+        print(f"seeded {args.users} users into {args.db} in {time.perf_counter() - started:.1f}s")
+
+    print(f"{args.requests} requests per flow, concurrency {args.concurrency}")
+    try:
+        flows = asyncio.run(run_load(args))
+    finally:
+        stub.should_exit = True
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "scale": {
+                key: getattr(args, key)
+                for key in ("users", "templates", "items", "months", "purchases", "active_users")
+            },
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "gemini_latency_ms": args.gemini_latency_ms,
+        },
+        "flows": flows,
+    }
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"wrote {args.output}")
+    if args.compare:
+        _compare(args.compare, flows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import json
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ..db import Base
+from ..logic import build_chat_context, generate_task_instances, get_or_create_month
+from ..models import Settings, ShopItem, TaskTemplate, User
+from ..prompt_context import encode_context, estimate_tokens
+
+# (label, templates, shop items, income)
+PROFILES = [
+    ("new user", 2, 1, 1200.0),
+    ("typical user", 8, 6, 3000.0),
+    ("power user", 60, 40, 8500.0),
+]
+
+
+def _seed(db, email: str, templates: int, items: int, income: float) -> int:
+    user = User(email=email, password_hash="x")
+    db.add(user)
+    db.flush()
+    db.add(Settings(user_id=user.id))
+    for i in range(templates):
+        db.add(
+            TaskTemplate(
+                user_id=user.id,
+                title=f"Task {i}: review budget category and log receipts",
+                category="chores",
+                difficulty=("easy", "med", "hard")[i % 3],
+                exp_value=(5, 10, 20)[i % 3],
+                schedule_type="daily",
+            )
+        )
+    for i in range(items):
+        db.add(
+            ShopItem(
+                user_id=user.id,
+                name=f"Treat {i}",
+                tier=100 + 50 * (i % 3),
+                exp_cost=100 + 50 * (i % 3),
+                cash_price=12.5 + i,
+                category="fun",
+            )
+        )
+    db.commit()
+    get_or_create_month(db, user.id, income, 1.0)
+    generate_task_instances(db, user.id, datetime.utcnow().date())
+    return user.id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare chat prompt context sizes.")
+    parser.add_argument("--budget", type=int, default=200, help="Token budget for the trimmed variant.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    results = []
+    for index, (label, templates, items, income) in enumerate(PROFILES):
+        user_id = _seed(db, f"bench{index}@example.com", templates, items, income)
+        context = build_chat_context(db, user_id)
+        variants = {
+            "pretty": json.dumps(context, indent=2),
+            "compact": encode_context(context, token_budget=0),
+            f"budget_{args.budget}": encode_context(context, token_budget=args.budget),
+        }
+        results.append(
+            {
+                "profile": label,
+                **{
+                    name: {"bytes": len(text.encode("utf-8")), "est_tokens": estimate_tokens(text)}
+                    for name, text in variants.items()
+                },
+            }
+        )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for row in results:
+        pretty = row["pretty"]
+        print(row["profile"])
+        for name, size in row.items():
+            if name == "profile":
+                continue
+            saved = 100 * (1 - size["bytes"] / pretty["bytes"])
+            print(f"  {name:<12} {size['bytes']:>6} bytes  ~{size['est_tokens']:>5} tokens  ({saved:4.1f}% smaller)")
+
+
+if __name__ == "__main__":
+    main()
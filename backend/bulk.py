@@ -0,0 +1,201 @@
+import codecs
+import csv
+import json
+import os
+from typing import AsyncIterator, Callable, Dict, List, Optional, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import AsyncSessionLocal
+from .logic import default_exp_for_difficulty
+from .models import Month, Purchase, Settings, ShopItem, TaskInstance, TaskTemplate
+from .responses import dumps
+from .schemas import ShopItemIn, TaskTemplateIn
+
+MAX_REPORTED_ERRORS = 50
+
+CSV_TYPES = ("text/csv", "application/csv")
+
+
+def _chunk_size() -> int:
+    return max(int(os.getenv("BULK_CHUNK_SIZE", "500")), 1)
+
+
+def _export_batch_size() -> int:
+    return max(int(os.getenv("EXPORT_BATCH_SIZE", "1000")), 1)
+
+
+async def _lines(body: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in body:
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def _csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Optional[dict]]:
+    header: Optional[List[str]] = None
+    record = ""
+    async for line in lines:
+        record = f"{record}\n{line}" if record else line
+        # An odd number of quotes means a quoted field continues on the next line.
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            yield None
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        # Empty cells fall back to the schema defaults.
+        yield {name: value for name, value in zip(header, values) if value != ""}
+    if record:
+        raise HTTPException(status_code=400, detail="Unterminated quoted CSV field.")
+
+
+async def _ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Optional[dict]]:
+    async for line in lines:
+        if not line.strip():
+            yield None
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield {"__error__": "Invalid JSON."}
+            continue
+        yield record if isinstance(record, dict) else {"__error__": "Expected a JSON object."}
+
+
+def _template_row(payload: TaskTemplateIn, user_id: int, settings: Optional[Settings]) -> dict:
+    exp_value = payload.exp_value
+    if exp_value is None:
+        exp_value = default_exp_for_difficulty(settings, payload.difficulty)
+    return {
+        "user_id": user_id,
+        "title": payload.title,
+        "category": payload.category,
+        "difficulty": payload.difficulty,
+        "exp_value": int(exp_value),
+        "schedule_type": payload.schedule_type,
+        "schedule_meta": json.dumps(payload.schedule_meta) if payload.schedule_meta else None,
+        "active": payload.active,
+    }
+
+
+def _shop_item_row(payload: ShopItemIn, user_id: int, settings: Optional[Settings]) -> dict:
+    exp_cost = payload.exp_cost if payload.exp_cost is not None else payload.tier
+    return {
+        "user_id": user_id,
+        "name": payload.name,
+        "tier": payload.tier,
+        "exp_cost": int(exp_cost),
+        "cash_price": payload.cash_price,
+        "category": payload.category,
+        "active": payload.active,
+    }
+
+
+def _validate(schema: Type[BaseModel], record: dict) -> BaseModel:
+    if "__error__" in record:
+        raise ValueError(record["__error__"])
+    meta = record.get("schedule_meta")
+    if isinstance(meta, str):
+        # CSV carries schedule_meta as a JSON cell.
+        record = {**record, "schedule_meta": json.loads(meta)}
+    return schema.model_validate(record)
+
+
+async def _bulk_import(
+    db: AsyncSession,
+    user_id: int,
+    body: AsyncIterator[bytes],
+    content_type: str,
+    model,
+    schema: Type[BaseModel],
+    to_row: Callable[[BaseModel, int, Optional[Settings]], dict],
+) -> Dict:
+    # Invalid rows are reported and skipped; valid rows are inserted with one executemany
+    # and one commit per chunk, so memory stays bounded by the chunk size.
+    settings = await db.get(Settings, user_id)
+    is_csv = content_type.split(";", 1)[0].strip().lower() in CSV_TYPES
+    records = (_csv_records if is_csv else _ndjson_records)(_lines(body))
+    chunk_size = _chunk_size()
+    chunk: List[dict] = []
+    imported = 0
+    errors: List[dict] = []
+    error_count = 0
+    row_number = 0
+    async for record in records:
+        row_number += 1
+        if record is None:
+            continue
+        try:
+            chunk.append(to_row(_validate(schema, record), user_id, settings))
+        except (ValidationError, ValueError) as exc:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                message = exc.errors()[0]["msg"] if isinstance(exc, ValidationError) else str(exc)
+                errors.append({"row": row_number, "error": message})
+            continue
+        if len(chunk) >= chunk_size:
+            await db.execute(insert(model), chunk)
+            await db.commit()
+            imported += len(chunk)
+            chunk = []
+    if chunk:
+        await db.execute(insert(model), chunk)
+        await db.commit()
+        imported += len(chunk)
+    return {"imported": imported, "rejected": error_count, "errors": errors}
+
+
+async def import_task_templates(db: AsyncSession, user_id: int, body: AsyncIterator[bytes], content_type: str) -> Dict:
+    return await _bulk_import(db, user_id, body, content_type, TaskTemplate, TaskTemplateIn, _template_row)
+
+
+async def import_shop_items(db: AsyncSession, user_id: int, body: AsyncIterator[bytes], content_type: str) -> Dict:
+    return await _bulk_import(db, user_id, body, content_type, ShopItem, ShopItemIn, _shop_item_row)
+
+
+EXPORT_TABLES = (
+    ("settings", Settings),
+    ("task_template", TaskTemplate),
+    ("shop_item", ShopItem),
+    ("task_instance", TaskInstance),
+    ("month", Month),
+    ("purchase", Purchase),
+)
+
+
+async def export_user_data(user_id: int) -> AsyncIterator[bytes]:
+    # Runs inside the StreamingResponse, after request dependencies have been torn down,
+    # so it owns its session. Rows are fetched yield_per at a time and written as NDJSON.
+    async with AsyncSessionLocal() as db:
+        for record_type, model in EXPORT_TABLES:
+            columns = [column for column in model.__table__.c if column.name != "user_id"]
+            order = model.__table__.primary_key.columns.values()
+            query = (
+                select(*columns)
+                .where(model.user_id == user_id)
+                .order_by(*order)
+                .execution_options(yield_per=_export_batch_size())
+            )
+            result = await db.stream(query)
+            async for partition in result.mappings().partitions():
+                lines = []
+                for row in partition:
+                    record = {"type": record_type, **row}
+                    if record.get("schedule_meta"):
+                        record["schedule_meta"] = json.loads(record["schedule_meta"])
+                    lines.append(dumps(record))
+                yield b"\n".join(lines) + b"\n"
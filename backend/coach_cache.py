@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from .ttl_cache import TTLCache
+
+
+class CoachCacheEntry(NamedTuple):
+    user_id: int
+    response: str
+    upstream_ms: float
+    expires_at: float
+
+
+def _normalize_message(message: str) -> str:
+    return " ".join(message.split()).lower()
+
+
+class _CoachCache:
+    # LRU + TTL cache of coach replies. Keys hash the normalized APP_CONTEXT, so any change to
+    # month state or the selected item produces a new key; invalidate_user drops the stale ones.
+    # Expiry uses wall-clock time because entries outlive the process in the optional sqlite table.
+    def __init__(self, max_size: int, ttl_seconds: float, db_path: Optional[str]):
+        self.saved_upstream_ms = 0.0
+        self._entries: "TTLCache[str, CoachCacheEntry]" = TTLCache(max_size, ttl_seconds, clock=time.time)
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS coach_cache ("
+                "key TEXT PRIMARY KEY, user_id INTEGER NOT NULL, response TEXT NOT NULL, "
+                "upstream_ms REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_coach_cache_user ON coach_cache (user_id)")
+            self._db.commit()
+
+    @property
+    def max_size(self) -> int:
+        return self._entries.max_size
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._entries.ttl_seconds
+
+    @ttl_seconds.setter
+    def ttl_seconds(self, value: float) -> None:
+        self._entries.ttl_seconds = value
+
+    def key(self, user_id: int, context_json: dict, message: str) -> str:
+        normalized = json.dumps(
+            {"user_id": user_id, "context": context_json, "message": _normalize_message(message)},
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def _load(self, key: str) -> Optional[CoachCacheEntry]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT user_id, response, upstream_ms, expires_at FROM coach_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+        return CoachCacheEntry(*row) if row else None
+
+    def _save(self, key: str, entry: CoachCacheEntry) -> None:
+        with self._db_lock:
+            # Expired rows are never read again; drop them here so the table stays bounded.
+            self._db.execute("DELETE FROM coach_cache WHERE expires_at < ?", (time.time(),))
+            self._db.execute(
+                "INSERT OR REPLACE INTO coach_cache (key, user_id, response, upstream_ms, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, *entry),
+            )
+            self._db.commit()
+
+    def _delete_user(self, user_id: int) -> None:
+        with self._db_lock:
+            self._db.execute("DELETE FROM coach_cache WHERE user_id = ?", (user_id,))
+            self._db.commit()
+
+    async def get(self, key: str) -> Optional[str]:
+        # Hits and misses are counted once the disk table has been consulted as well.
+        entry = self._entries.get(key, record=False)
+        if entry is None and self._db is not None:
+            entry = await asyncio.to_thread(self._load, key)
+            if entry is not None and entry.expires_at >= time.time():
+                self._entries.put(key, entry, expires_at=entry.expires_at)
+            else:
+                entry = None
+        self._entries.record(entry is not None)
+        if entry is None:
+            return None
+        with self._entries.lock:
+            self.saved_upstream_ms += entry.upstream_ms
+        return entry.response
+
+    async def put(self, key: str, user_id: int, response: str, upstream_ms: float) -> None:
+        if self.max_size <= 0:
+            return
+        entry = CoachCacheEntry(user_id, response, round(upstream_ms, 1), time.time() + self.ttl_seconds)
+        self._entries.put(key, entry, expires_at=entry.expires_at)
+        if self._db is not None:
+            await asyncio.to_thread(self._save, key, entry)
+
+    async def invalidate_user(self, user_id: int) -> None:
+        self._entries.pop_where(lambda entry: entry.user_id == user_id)
+        if self._db is not None:
+            await asyncio.to_thread(self._delete_user, user_id)
+
+    def clear(self) -> None:
+        # In-memory entries only; persisted rows still expire on their own.
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._entries.lock:
+            return {
+                **self._entries.stats(),
+                "persistent": self._db is not None,
+                "saved_upstream_ms": round(self.saved_upstream_ms, 1),
+            }
+
+
+coach_cache = _CoachCache(
+    max_size=int(os.getenv("COACH_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.getenv("COACH_CACHE_TTL", "900")),
+    db_path=os.getenv("COACH_CACHE_DB") or None,
+)
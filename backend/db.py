@@ -1,13 +1,124 @@
-from sqlalchemy import create_engine
+import os
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .metrics import record_query
+
+# Engine settings are read at import time, so .env has to be loaded before main.py gets to it.
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative cache_size is in KiB rather than pages.
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024))),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "temp_store": "MEMORY",
+}
+
+
+def _apply_sqlite_pragmas(engine: Engine, in_memory: bool) -> None:
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in SQLITE_PRAGMAS.items():
+                if in_memory and name == "journal_mode":
+                    continue
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def _record_query_timings(engine: Engine) -> None:
+    # Feeds the per-request query count and DB time (Server-Timing and /metrics).
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        record_query(time.perf_counter() - context._query_started)
+
 
-DATABASE_URL = "sqlite:///./app.db"
+def create_db_engine(url: str = DATABASE_URL) -> Engine:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        in_memory = parsed.database in (None, "", ":memory:")
+        kwargs = {"connect_args": {"check_same_thread": False}}
+        if not in_memory:
+            kwargs["pool_size"] = int(os.getenv("DB_POOL_SIZE", "10"))
+            kwargs["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+            kwargs["pool_timeout"] = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+        engine = create_engine(url, **kwargs)
+        _apply_sqlite_pragmas(engine, in_memory)
+        _record_query_timings(engine)
+        return engine
+    engine = create_engine(
+        url,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_pre_ping=True,
+    )
+    _record_query_timings(engine)
+    return engine
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        in_memory = parsed.database in (None, "", ":memory:")
+        kwargs = {}
+        if not in_memory:
+            # Keep aiosqlite connections (and their threads) alive instead of reopening per session.
+            kwargs["poolclass"] = AsyncAdaptedQueuePool
+            kwargs["pool_size"] = int(os.getenv("DB_POOL_SIZE", "10"))
+            kwargs["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+            kwargs["pool_timeout"] = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+        engine = create_async_engine(_async_url(url), **kwargs)
+        _apply_sqlite_pragmas(engine.sync_engine, in_memory)
+        _record_query_timings(engine.sync_engine)
+        return engine
+    engine = create_async_engine(
+        _async_url(url),
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_pre_ping=True,
+    )
+    _record_query_timings(engine.sync_engine)
+    return engine
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine(os.getenv("ASYNC_DATABASE_URL", DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -17,3 +128,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,12 +1,18 @@
+import asyncio
 import json
 import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional, Tuple
 
 import httpx
 
+from .metrics import record_llm
 
-GEMINI_URL = (
-    "https://generativelanguage.googleapis.com/v1beta/models/"
-    "gemini-pro:generateContent"
+
+GEMINI_BASE_URL = (
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro"
 )
 
 FALLBACK_RESPONSE = (
@@ -16,6 +22,77 @@ FALLBACK_RESPONSE = (
 )
 
 
+class GeminiBusy(Exception):
+    pass
+
+
+_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _http2_enabled() -> bool:
+    if os.getenv("GEMINI_HTTP2", "1") != "1":
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    timeout = float(os.getenv("GEMINI_TIMEOUT", "15"))
+    return httpx.AsyncClient(
+        http2=_http2_enabled(),
+        timeout=httpx.Timeout(
+            timeout,
+            connect=float(os.getenv("GEMINI_CONNECT_TIMEOUT", "5")),
+            pool=float(os.getenv("GEMINI_POOL_TIMEOUT", "5")),
+        ),
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("GEMINI_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("GEMINI_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("GEMINI_KEEPALIVE_EXPIRY", "30")),
+        ),
+    )
+
+
+async def start_gemini_client() -> None:
+    global _client, _semaphore
+    if _client is None:
+        _client = _build_client()
+    _semaphore = asyncio.Semaphore(int(os.getenv("GEMINI_MAX_CONCURRENCY", "16")))
+
+
+async def close_gemini_client() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def _upstream_slot():
+    # Lazily start when used outside the app lifespan (scripts, tests).
+    if _client is None or _semaphore is None:
+        await start_gemini_client()
+    try:
+        await asyncio.wait_for(
+            _semaphore.acquire(), timeout=float(os.getenv("GEMINI_QUEUE_TIMEOUT", "2"))
+        )
+    except asyncio.TimeoutError as exc:
+        raise GeminiBusy() from exc
+    try:
+        yield _client
+    finally:
+        _semaphore.release()
+
+
+def _gemini_url(method: str) -> str:
+    # GEMINI_BASE_URL can point at a local mock server for latency measurements.
+    return f"{os.getenv('GEMINI_BASE_URL', GEMINI_BASE_URL)}:{method}"
+
+
 def _extract_context_numbers(prompt: str) -> tuple[str | None, str | None, str | None]:
     marker = "APP_CONTEXT:"
     if marker not in prompt:
@@ -37,24 +114,223 @@ def _extract_context_numbers(prompt: str) -> tuple[str | None, str | None, str |
         return None, None, None
 
 
+def _offline_response(prompt: str) -> str:
+    cash, exp, pending = _extract_context_numbers(prompt)
+    if cash and exp and pending:
+        return (
+            "I can’t access the AI coach right now, but you have "
+            f"${cash} cash available and {exp} EXP available. "
+            f"Consider completing {pending} task(s) to unlock more."
+        )
+    return FALLBACK_RESPONSE
+
+
+def is_upstream_reply(text: str, prompt: str) -> bool:
+    # Offline and fallback answers are cheap to rebuild and must not be cached as advice.
+    return text != FALLBACK_RESPONSE and text != _offline_response(prompt)
+
+
+def _candidate_text(data: dict) -> str:
+    return data["candidates"][0]["content"]["parts"][0]["text"]
+
+
+def _chunk_text(data: dict) -> str:
+    # Streams end with a chunk that only carries finishReason/usageMetadata.
+    try:
+        return _candidate_text(data)
+    except (KeyError, IndexError, TypeError):
+        return ""
+
+
+class _CircuitBreaker:
+    # Rolling window of (ok, latency_ms). Opens on a high failure rate or a slow p95, then
+    # lets a single probe through after the cooldown (half-open) to decide whether to close.
+    def __init__(self, window: int, min_calls: int, failure_rate: float, slow_ms: float, cooldown: float):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_ms = slow_ms
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.short_circuited = 0
+        self._samples: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.short_circuited += 1
+        return False
+
+    def _open(self) -> None:
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def record(self, ok: bool, latency_ms: float) -> None:
+        self._samples.append((ok, latency_ms))
+        if self.state == "half_open":
+            if ok and latency_ms <= self.slow_ms:
+                self.state = "closed"
+                self._probe_in_flight = False
+                self._samples.clear()
+            else:
+                self._open()
+            return
+        if len(self._samples) < self.min_calls:
+            return
+        failures = sum(1 for sample_ok, _ in self._samples if not sample_ok)
+        if failures / len(self._samples) >= self.failure_rate or self.percentile(95) > self.slow_ms:
+            self._open()
+
+    def abandon(self) -> None:
+        # A probe that ended without an upstream verdict (client gone, local queue full).
+        if self.state == "half_open" and self._probe_in_flight:
+            self._open()
+            self._opened_at -= self.cooldown
+
+    def percentile(self, pct: float) -> float:
+        latencies = sorted(latency for _, latency in self._samples)
+        if not latencies:
+            return 0.0
+        index = min(len(latencies) - 1, int(round(pct / 100 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def stats(self) -> dict:
+        total = len(self._samples)
+        failures = sum(1 for ok, _ in self._samples if not ok)
+        return {
+            "state": self.state,
+            "window_calls": total,
+            "failure_rate": round(failures / total, 4) if total else 0.0,
+            "p50_ms": round(self.percentile(50), 1),
+            "p95_ms": round(self.percentile(95), 1),
+            "short_circuited": self.short_circuited,
+        }
+
+
+def _build_breaker() -> _CircuitBreaker:
+    return _CircuitBreaker(
+        window=int(os.getenv("GEMINI_BREAKER_WINDOW", "20")),
+        min_calls=int(os.getenv("GEMINI_BREAKER_MIN_CALLS", "5")),
+        failure_rate=float(os.getenv("GEMINI_BREAKER_FAILURE_RATE", "0.5")),
+        slow_ms=float(os.getenv("GEMINI_BREAKER_SLOW_MS", "8000")),
+        cooldown=float(os.getenv("GEMINI_BREAKER_COOLDOWN", "30")),
+    )
+
+
+breaker = _build_breaker()
+
+
+def _latency_budget() -> Optional[float]:
+    budget_ms = float(os.getenv("GEMINI_LATENCY_BUDGET_MS", "0"))
+    return budget_ms / 1000 if budget_ms > 0 else None
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+async def _generate(prompt: str, api_key: str) -> Optional[str]:
+    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+    async with _upstream_slot() as client:
+        started = time.perf_counter()
+        try:
+            resp = await client.post(f"{_gemini_url('generateContent')}?key={api_key}", json=payload)
+            if resp.status_code >= 400:
+                return None
+            return _candidate_text(resp.json())
+        except (httpx.HTTPError, ValueError, KeyError, IndexError, TypeError):
+            return None
+        finally:
+            record_llm(time.perf_counter() - started)
+
+
 async def gemini_chat(prompt: str) -> str:
     api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        cash, exp, pending = _extract_context_numbers(prompt)
-        if cash and exp and pending:
-            return (
-                "I can’t access the AI coach right now, but you have "
-                f"${cash} cash available and {exp} EXP available. "
-                f"Consider completing {pending} task(s) to unlock more."
-            )
+    if not api_key or not breaker.allow():
+        return _offline_response(prompt)
+    started = time.perf_counter()
+    try:
+        # Past the latency budget the upstream call is cancelled and the local answer returned.
+        text = await asyncio.wait_for(_generate(prompt, api_key), timeout=_latency_budget())
+    except asyncio.TimeoutError:
+        breaker.record(False, _elapsed_ms(started))
+        return _offline_response(prompt)
+    except GeminiBusy:
+        breaker.abandon()
         return FALLBACK_RESPONSE
+    except BaseException:
+        breaker.abandon()
+        raise
+    breaker.record(text is not None, _elapsed_ms(started))
+    return text if text is not None else FALLBACK_RESPONSE
+
+
+async def _stream_upstream(prompt: str, api_key: str) -> AsyncIterator[str]:
     payload = {"contents": [{"parts": [{"text": prompt}]}]}
+    async with _upstream_slot() as client:
+        started = time.perf_counter()
+        try:
+            async with client.stream(
+                "POST",
+                f"{_gemini_url('streamGenerateContent')}?alt=sse&key={api_key}",
+                json=payload,
+            ) as resp:
+                if resp.status_code >= 400:
+                    return
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    text = _chunk_text(json.loads(line[len("data:"):]))
+                    if text:
+                        yield text
+        finally:
+            record_llm(time.perf_counter() - started)
+
+
+async def gemini_chat_stream(prompt: str) -> AsyncIterator[str]:
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key or not breaker.allow():
+        yield _offline_response(prompt)
+        return
+    started = time.perf_counter()
+    upstream = _stream_upstream(prompt, api_key)
+    recorded = False
     try:
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.post(f"{GEMINI_URL}?key={api_key}", json=payload)
-        if resp.status_code >= 400:
-            return FALLBACK_RESPONSE
-        data = resp.json()
-        return data["candidates"][0]["content"]["parts"][0]["text"]
-    except Exception:
-        return FALLBACK_RESPONSE
+        try:
+            # The latency budget covers time to first token.
+            first = await asyncio.wait_for(upstream.__anext__(), timeout=_latency_budget())
+        except asyncio.TimeoutError:
+            breaker.record(False, _elapsed_ms(started))
+            recorded = True
+            yield _offline_response(prompt)
+            return
+        except GeminiBusy:
+            yield FALLBACK_RESPONSE
+            return
+        except StopAsyncIteration:
+            breaker.record(False, _elapsed_ms(started))
+            recorded = True
+            yield FALLBACK_RESPONSE
+            return
+        except Exception:
+            breaker.record(False, _elapsed_ms(started))
+            recorded = True
+            yield FALLBACK_RESPONSE
+            return
+        breaker.record(True, _elapsed_ms(started))
+        recorded = True
+        yield first
+        # Once tokens have reached the client, errors propagate instead of appending a canned answer.
+        async for text in upstream:
+            yield text
+    finally:
+        if not recorded:
+            breaker.abandon()
+        await upstream.aclose()
@@ -1,11 +1,18 @@
+import hashlib
+import itertools
 import json
-from datetime import datetime, date as date_cls
-from typing import Optional, Tuple, Dict
+import os
+from datetime import datetime, date as date_cls, timedelta
+from typing import Callable, List, NamedTuple, Optional, Tuple, Dict
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import Numeric, and_, case, cast, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from .models import Month, TaskTemplate, TaskInstance, ShopItem, Purchase, Settings
+from .ttl_cache import TTLCache
 
 def get_or_create_month(db: Session, user_id: int, income: float, ratio: float) -> Month:
     today = datetime.utcnow().date()
@@ -41,6 +48,7 @@ def get_or_create_month(db: Session, user_id: int, income: float, ratio: float)
         db.add(row)
     db.commit()
     db.refresh(row)
+    month_state_cache.invalidate(user_id)
     return row
 
 
@@ -85,7 +93,92 @@ def compute_month_state(month: Month) -> Dict[str, float]:
     }
 
 
-def _schedule_matches(template: TaskTemplate, target_date: date_cls) -> bool:
+class MonthStateSnapshot(NamedTuple):
+    year: int
+    month: int
+    version: int
+    etag: str
+    state: Dict
+
+
+class _MonthStateCache:
+    # Per-process LRU of compute_month_state snapshots. Writers invalidate after they commit and
+    # readers fill it, passing the generation they saw before loading the Month; a fill that
+    # raced a write is dropped instead of caching the older state. The TTL bounds staleness
+    # when other workers write to the same user.
+    def __init__(self, max_size: int, ttl_seconds: float):
+        # user_id -> (generation, snapshot); the snapshot is None until a reader fills it.
+        self._entries: "TTLCache[int, Tuple[int, Optional[MonthStateSnapshot]]]" = TTLCache(
+            max_size, ttl_seconds
+        )
+        self._generations = itertools.count(1)
+
+    def get(self, user_id: int, year: int, month: int) -> Optional[MonthStateSnapshot]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] is None:
+            return None
+        snapshot = entry[1]
+        if (snapshot.year, snapshot.month) != (year, month):
+            return None
+        return snapshot
+
+    def generation(self, user_id: int) -> int:
+        # Read before loading the Month that will be passed to store().
+        with self._entries.lock:
+            entry = self._entries.get(user_id, record=False)
+            if entry is None:
+                entry = (next(self._generations), None)
+                self._entries.put(user_id, entry)
+            return entry[0]
+
+    def store(self, user_id: int, month: Month, generation: int) -> MonthStateSnapshot:
+        state = compute_month_state(month)
+        digest = hashlib.sha1(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()
+        snapshot = MonthStateSnapshot(
+            year=month.year,
+            month=month.month,
+            version=generation,
+            etag=f'"{digest[:20]}"',
+            state=state,
+        )
+        with self._entries.lock:
+            entry = self._entries.get(user_id, record=False)
+            # Evicted, expired or invalidated since the caller read the generation: a write may
+            # have committed after the Month was loaded.
+            if entry is not None and entry[0] == generation:
+                self._entries.put(user_id, (generation, snapshot))
+        return snapshot
+
+    def invalidate(self, user_id: int) -> None:
+        with self._entries.lock:
+            if self._entries.get(user_id, record=False) is not None:
+                self._entries.put(user_id, (next(self._generations), None))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+month_state_cache = _MonthStateCache(
+    max_size=int(os.getenv("MONTH_STATE_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("MONTH_STATE_CACHE_TTL", "60")),
+)
+
+
+WEEKDAY_INDEX = {
+    "monday": 0,
+    "tuesday": 1,
+    "wednesday": 2,
+    "thursday": 3,
+    "friday": 4,
+    "saturday": 5,
+    "sunday": 6,
+}
+
+MAX_GENERATE_RANGE_DAYS = 31
+
+
+def _compile_schedule(template: TaskTemplate) -> Callable[[date_cls], bool]:
+    # Parse schedule_meta once so range generation doesn't re-decode JSON per day.
     meta = {}
     if template.schedule_meta:
         try:
@@ -93,49 +186,76 @@ def _schedule_matches(template: TaskTemplate, target_date: date_cls) -> bool:
         except json.JSONDecodeError:
             meta = {}
     if template.schedule_type == "daily":
-        return True
+        return lambda target_date: True
     if template.schedule_type == "one_time":
-        return meta.get("date") == target_date.strftime("%Y-%m-%d")
+        one_time = meta.get("date")
+        return lambda target_date: one_time == target_date.strftime("%Y-%m-%d")
     if template.schedule_type == "weekly":
-        weekdays = meta.get("weekdays", [])
-        return target_date.strftime("%A").lower() in [d.lower() for d in weekdays]
+        mask = 0
+        for name in meta.get("weekdays", []):
+            index = WEEKDAY_INDEX.get(str(name).lower())
+            if index is not None:
+                mask |= 1 << index
+        return lambda target_date: bool(mask >> target_date.weekday() & 1)
     if template.schedule_type == "monthly":
         day = meta.get("day")
-        return day == target_date.day
-    return False
+        return lambda target_date: day == target_date.day
+    return lambda target_date: False
+
+
+def _insert_ignore(db: Session, model):
+    # ON CONFLICT DO NOTHING is spelled the same way by SQLite and Postgres.
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model.__table__)
 
 
 def generate_task_instances(db: Session, user_id: int, target_date: date_cls) -> int:
+    return generate_task_instances_range(db, user_id, target_date, target_date)
+
+
+def generate_task_instances_range(
+    db: Session, user_id: int, start_date: date_cls, end_date: date_cls
+) -> int:
     templates = (
         db.query(TaskTemplate)
         .filter(TaskTemplate.user_id == user_id, TaskTemplate.active == True)  # noqa: E712
         .all()
     )
-    created = 0
-    for template in templates:
-        if not _schedule_matches(template, target_date):
-            continue
-        existing = (
-            db.query(TaskInstance)
-            .filter(
-                TaskInstance.user_id == user_id,
-                TaskInstance.template_id == template.id,
-                TaskInstance.date == target_date.strftime("%Y-%m-%d"),
-            )
-            .first()
+    matchers = [(template.id, _compile_schedule(template)) for template in templates]
+    if not matchers:
+        return 0
+    start_str = start_date.strftime("%Y-%m-%d")
+    end_str = end_date.strftime("%Y-%m-%d")
+    existing = set(
+        db.query(TaskInstance.template_id, TaskInstance.date).filter(
+            TaskInstance.user_id == user_id,
+            TaskInstance.date >= start_str,
+            TaskInstance.date <= end_str,
         )
-        if existing:
-            continue
-        instance = TaskInstance(
-            user_id=user_id,
-            template_id=template.id,
-            date=target_date.strftime("%Y-%m-%d"),
-            status="pending",
-        )
-        db.add(instance)
-        created += 1
+    )
+    rows = []
+    day = start_date
+    while day <= end_date:
+        date_str = day.strftime("%Y-%m-%d")
+        for template_id, matches in matchers:
+            if (template_id, date_str) in existing or not matches(day):
+                continue
+            rows.append(
+                {"user_id": user_id, "template_id": template_id, "date": date_str, "status": "pending"}
+            )
+        day += timedelta(days=1)
+    if not rows:
+        return 0
+    # The uniq_user_template_date constraint absorbs concurrent generate calls.
+    stmt = _insert_ignore(db, TaskInstance).on_conflict_do_nothing(
+        index_elements=["user_id", "template_id", "date"]
+    )
+    result = db.execute(stmt, rows)
     db.commit()
-    return created
+    return result.rowcount if result.rowcount >= 0 else len(rows)
 
 
 def _current_month(db: Session, user_id: int) -> Month:
@@ -174,9 +294,52 @@ def complete_task_instance(db: Session, user_id: int, instance_id: int, note: st
         month.exp_earned = round(month.exp_earned + awarded, 2)
     db.commit()
     db.refresh(instance)
+    if awarded > 0:
+        month_state_cache.invalidate(user_id)
     return instance, awarded
 
 
+def complete_task_instances_batch(
+    db: Session, user_id: int, items: List[Tuple[int, str]]
+) -> Tuple[List[Dict], Dict]:
+    for _instance_id, note in items:
+        if len(note.strip()) < 8:
+            raise HTTPException(status_code=400, detail="Completion note must be at least 8 characters.")
+    ids = [instance_id for instance_id, _note in items]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Each task instance may appear only once.")
+    instances = {
+        instance.id: instance
+        for instance in db.query(TaskInstance)
+        .options(joinedload(TaskInstance.template))
+        .filter(TaskInstance.user_id == user_id, TaskInstance.id.in_(ids))
+    }
+    for instance_id in ids:
+        instance = instances.get(instance_id)
+        if not instance:
+            raise HTTPException(status_code=404, detail="Task instance not found.")
+        if instance.status != "pending":
+            raise HTTPException(status_code=400, detail="Task instance is not pending.")
+    month = _current_month(db, user_id)
+    exp_cap = compute_month_state(month)["exp_cap"]
+    now = datetime.utcnow()
+    results = []
+    # Apply the cap in request order so earlier items are awarded first.
+    for instance_id, note in items:
+        instance = instances[instance_id]
+        cap_remaining = max(exp_cap - month.exp_earned, 0.0)
+        awarded = float(min(instance.template.exp_value, cap_remaining))
+        instance.status = "completed"
+        instance.completion_note = note.strip()
+        instance.completed_at = now
+        if awarded > 0:
+            month.exp_earned = round(month.exp_earned + awarded, 2)
+        results.append({"id": instance.id, "status": instance.status, "awarded_exp": awarded})
+    db.commit()
+    month_state_cache.invalidate(user_id)
+    return results, compute_month_state(month)
+
+
 def skip_task_instance(db: Session, user_id: int, instance_id: int) -> TaskInstance:
     instance = (
         db.query(TaskInstance)
@@ -193,50 +356,123 @@ def skip_task_instance(db: Session, user_id: int, instance_id: int) -> TaskInsta
     return instance
 
 
-def can_purchase(db: Session, user_id: int, item_id: int) -> Tuple[bool, str]:
-    item = (
-        db.query(ShopItem)
-        .filter(ShopItem.user_id == user_id, ShopItem.id == item_id, ShopItem.active == True)  # noqa: E712
-        .first()
-    )
-    if not item:
-        return False, "Item not found."
-    month = _current_month(db, user_id)
+def _purchase_shortfall(item: ShopItem, month: Month) -> Optional[str]:
     state = compute_month_state(month)
     if item.exp_cost > state["exp_available"]:
-        return False, "Not enough EXP available."
+        return "Not enough EXP available."
     if item.cash_price > state["cash_available"]:
-        return False, "Not enough unlocked cash available."
-    return True, "OK"
+        return "Not enough unlocked cash available."
+    return None
+
 
+def _round2(expr):
+    # Cast so Postgres accepts ROUND(x, 2) on double precision columns; SQLite ignores it.
+    return func.round(cast(expr, Numeric), 2)
 
-def purchase_item(db: Session, user_id: int, item_id: int) -> Purchase:
-    item = (
-        db.query(ShopItem)
+
+def purchase_item(db: Session, user_id: int, item_id: int) -> Tuple[Purchase, Dict]:
+    today = datetime.utcnow().date()
+    row = (
+        db.query(ShopItem, Month)
+        .outerjoin(
+            Month,
+            and_(Month.user_id == ShopItem.user_id, Month.year == today.year, Month.month == today.month),
+        )
         .filter(ShopItem.user_id == user_id, ShopItem.id == item_id, ShopItem.active == True)  # noqa: E712
         .first()
     )
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found.")
-    month = _current_month(db, user_id)
-    state = compute_month_state(month)
-    if item.exp_cost > state["exp_available"]:
-        raise HTTPException(status_code=400, detail="Not enough EXP available.")
-    if item.cash_price > state["cash_available"]:
-        raise HTTPException(status_code=400, detail="Not enough unlocked cash available.")
+    if not row:
+        raise HTTPException(status_code=400, detail="Item not found.")
+    item, month = row
+    if month is None:
+        raise HTTPException(status_code=400, detail="Start the month first with /month/start.")
+    reason = _purchase_shortfall(item, month)
+    if reason:
+        raise HTTPException(status_code=400, detail=reason)
+
+    # Re-check the balances inside the UPDATE so concurrent purchases cannot both pass.
+    ratio = case((Month.ratio > 0, Month.ratio), else_=1.0)
+    unlocked = case(
+        (Month.exp_earned * ratio < Month.psp_total, Month.exp_earned * ratio),
+        else_=Month.psp_total,
+    )
+    updated = db.execute(
+        update(Month)
+        .where(
+            Month.id == month.id,
+            _round2(Month.exp_earned - Month.exp_redeemed) >= item.exp_cost,
+            _round2(_round2(unlocked) - Month.cash_spent) >= item.cash_price,
+        )
+        .values(
+            exp_redeemed=_round2(Month.exp_redeemed + item.exp_cost),
+            cash_spent=_round2(Month.cash_spent + item.cash_price),
+        )
+        .returning(Month.exp_redeemed, Month.cash_spent)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if updated is None:
+        db.rollback()
+        db.refresh(month)
+        reason = _purchase_shortfall(item, month) or "Balances changed, please retry."
+        raise HTTPException(status_code=400, detail=reason)
+    set_committed_value(month, "exp_redeemed", float(updated.exp_redeemed))
+    set_committed_value(month, "cash_spent", float(updated.cash_spent))
+
     purchase = Purchase(
         user_id=user_id,
         month_id=month.id,
         item_id=item.id,
         exp_spent=float(item.exp_cost),
         cash_spent=float(item.cash_price),
+        purchased_at=datetime.utcnow(),
     )
-    month.exp_redeemed = round(month.exp_redeemed + item.exp_cost, 2)
-    month.cash_spent = round(month.cash_spent + item.cash_price, 2)
     db.add(purchase)
     db.commit()
-    db.refresh(purchase)
-    return purchase
+    month_state_cache.invalidate(user_id)
+    return purchase, compute_month_state(month)
+
+
+def next_month(year: int, month: int) -> Tuple[int, int]:
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def close_months(db: Session, user_ids: List[int], year: int, month: int) -> Tuple[int, int]:
+    # Persists projected_rollover_to_savings as savings_actual (same formula as compute_month_state)
+    # and opens the following month with the same plan. Already-closed months and
+    # already-existing next months are left alone, so re-running a chunk is a no-op.
+    ratio = case((Month.ratio > 0, Month.ratio), else_=1.0)
+    unlocked = case((Month.exp_earned * ratio < Month.psp_total, Month.exp_earned * ratio), else_=Month.psp_total)
+    locked = case((Month.psp_total > unlocked, Month.psp_total - unlocked), else_=0.0)
+    closed = db.execute(
+        update(Month)
+        .where(
+            Month.user_id.in_(user_ids),
+            Month.year == year,
+            Month.month == month,
+            Month.closed_at.is_(None),
+        )
+        .values(savings_actual=_round2(Month.savings_planned + locked), closed_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    next_year, next_month_number = next_month(year, month)
+    columns = ["user_id", "year", "month", "income", "ratio", "needs_planned", "savings_planned", "psp_total"]
+    source = select(
+        Month.user_id,
+        literal(next_year),
+        literal(next_month_number),
+        Month.income,
+        Month.ratio,
+        Month.needs_planned,
+        Month.savings_planned,
+        Month.psp_total,
+    ).where(Month.user_id.in_(user_ids), Month.year == year, Month.month == month)
+    stmt = _insert_ignore(db, Month).from_select(columns, source)
+    opened = db.execute(
+        stmt.on_conflict_do_nothing(index_elements=[Month.user_id, Month.year, Month.month])
+    ).rowcount
+    db.commit()
+    return closed, opened
 
 
 def default_exp_for_difficulty(settings: Settings, difficulty: str) -> int:
@@ -260,51 +496,55 @@ def build_chat_context(
         if date_str
         else datetime.utcnow().date()
     )
-    month = _current_month(db, user_id)
-    month_state = compute_month_state(month)
+    today = datetime.utcnow().date()
+    snapshot = month_state_cache.get(user_id, today.year, today.month)
+    if snapshot is None:
+        generation = month_state_cache.generation(user_id)
+        snapshot = month_state_cache.store(user_id, _current_month(db, user_id), generation)
+    month_state = dict(snapshot.state)
 
-    instances = (
-        db.query(TaskInstance)
-        .join(TaskTemplate, TaskInstance.template_id == TaskTemplate.id)
-        .filter(TaskInstance.user_id == user_id, TaskInstance.date == target_date.strftime("%Y-%m-%d"))
+    # Fixed query count regardless of how many tasks exist: one aggregate, one projection.
+    target_str = target_date.strftime("%Y-%m-%d")
+    status_counts = dict(
+        db.query(TaskInstance.status, func.count(TaskInstance.id))
+        .filter(TaskInstance.user_id == user_id, TaskInstance.date == target_str)
+        .group_by(TaskInstance.status)
         .all()
     )
-    pending_today = 0
-    completed_today = 0
-    next_tasks = []
-    for inst in instances:
-        if inst.status == "pending":
-            pending_today += 1
-            if len(next_tasks) < 3:
-                next_tasks.append(
-                    {
-                        "title": inst.template.title,
-                        "exp_value": inst.template.exp_value,
-                        "instance_id": inst.id,
-                    }
-                )
-        elif inst.status == "completed":
-            completed_today += 1
-
-    items = (
-        db.query(ShopItem)
-        .filter(ShopItem.user_id == user_id, ShopItem.active == True)  # noqa: E712
-        .limit(top_n_items)
-        .all()
+    pending_today = status_counts.get("pending", 0)
+    completed_today = status_counts.get("completed", 0)
+    next_tasks = [
+        {"title": title, "exp_value": exp_value, "instance_id": instance_id}
+        for instance_id, title, exp_value in (
+            db.query(TaskInstance.id, TaskTemplate.title, TaskTemplate.exp_value)
+            .join(TaskTemplate, TaskInstance.template_id == TaskTemplate.id)
+            .filter(
+                TaskInstance.user_id == user_id,
+                TaskInstance.date == target_str,
+                TaskInstance.status == "pending",
+            )
+            .order_by(TaskInstance.id)
+            .limit(3)
+        )
+    ]
+
+    item_columns = (
+        ShopItem.id,
+        ShopItem.name,
+        ShopItem.tier,
+        ShopItem.exp_cost,
+        ShopItem.cash_price,
+        ShopItem.category,
     )
     suggested_items = [
-        {
-            "id": item.id,
-            "name": item.name,
-            "tier": item.tier,
-            "exp_cost": item.exp_cost,
-            "cash_price": item.cash_price,
-            "category": item.category,
-        }
-        for item in items
+        row._asdict()
+        for row in db.query(*item_columns)
+        .filter(ShopItem.user_id == user_id, ShopItem.active == True)  # noqa: E712
+        .limit(top_n_items)
     ]
 
-    settings = db.query(Settings).filter(Settings.user_id == user_id).first()
+    # Session.get reuses a Settings row already in the identity map.
+    settings = db.get(Settings, user_id)
     settings_payload = None
     if settings:
         settings_payload = {
@@ -332,3 +572,50 @@ def build_chat_context(
             "cannot_spend_more_exp_than_exp_available": True,
         },
     }
+
+
+# Async entry points for the FastAPI handlers. The sync implementations above run
+# on the AsyncSession's connection through run_sync, so DB I/O never blocks the event loop.
+
+
+async def get_or_create_month_async(db: AsyncSession, user_id: int, income: float, ratio: float) -> Month:
+    return await db.run_sync(get_or_create_month, user_id, income, ratio)
+
+
+async def generate_task_instances_async(db: AsyncSession, user_id: int, target_date: date_cls) -> int:
+    return await db.run_sync(generate_task_instances, user_id, target_date)
+
+
+async def generate_task_instances_range_async(
+    db: AsyncSession, user_id: int, start_date: date_cls, end_date: date_cls
+) -> int:
+    return await db.run_sync(generate_task_instances_range, user_id, start_date, end_date)
+
+
+async def complete_task_instance_async(
+    db: AsyncSession, user_id: int, instance_id: int, note: str
+) -> Tuple[TaskInstance, float]:
+    return await db.run_sync(complete_task_instance, user_id, instance_id, note)
+
+
+async def complete_task_instances_batch_async(
+    db: AsyncSession, user_id: int, items: List[Tuple[int, str]]
+) -> Tuple[List[Dict], Dict]:
+    return await db.run_sync(complete_task_instances_batch, user_id, items)
+
+
+async def skip_task_instance_async(db: AsyncSession, user_id: int, instance_id: int) -> TaskInstance:
+    return await db.run_sync(skip_task_instance, user_id, instance_id)
+
+
+async def purchase_item_async(db: AsyncSession, user_id: int, item_id: int) -> Tuple[Purchase, Dict]:
+    return await db.run_sync(purchase_item, user_id, item_id)
+
+
+async def build_chat_context_async(
+    db: AsyncSession,
+    user_id: int,
+    date_str: Optional[str] = None,
+    top_n_items: int = 5,
+) -> Dict:
+    return await db.run_sync(build_chat_context, user_id, date_str, top_n_items)
@@ -1,13 +1,18 @@
+import base64
 import json
 import os
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from .db import Base, engine, get_db
+from .db import async_engine, engine, get_async_db
 from .models import User, Settings, TaskTemplate, TaskInstance, ShopItem, Month
 from .schemas import (
     AuthIn,
@@ -18,6 +23,7 @@ from .schemas import (
     TaskTemplateOut,
     TaskInstanceOut,
     CompleteTaskIn,
+    CompleteTaskBatchIn,
     ShopItemIn,
     ShopItemOut,
     PurchaseOut,
@@ -25,26 +31,73 @@ from .schemas import (
     ChatSpendAdviceIn,
     ChatOut,
 )
-from .auth import hash_password, verify_password, create_access_token, get_current_user
+from .auth import (
+    CurrentUser,
+    hash_password_async,
+    verify_password_async,
+    hash_pool,
+    create_access_token,
+    get_current_user,
+    get_current_user_claims,
+    user_cache,
+)
 from .logic import (
-    get_or_create_month,
+    get_or_create_month_async,
     compute_month_state,
-    generate_task_instances,
-    complete_task_instance,
-    skip_task_instance,
-    can_purchase,
-    purchase_item,
+    generate_task_instances_async,
+    generate_task_instances_range_async,
+    MAX_GENERATE_RANGE_DAYS,
+    month_state_cache,
+    complete_task_instance_async,
+    complete_task_instances_batch_async,
+    skip_task_instance_async,
+    purchase_item_async,
     default_exp_for_difficulty,
-    build_chat_context,
+    build_chat_context_async,
+)
+from .analytics import build_history_async
+from .bulk import export_user_data, import_shop_items, import_task_templates
+from .coach_cache import coach_cache
+from .gemini import (
+    breaker,
+    close_gemini_client,
+    gemini_chat,
+    gemini_chat_stream,
+    is_upstream_reply,
+    start_gemini_client,
 )
-from .gemini import gemini_chat
+from .metrics import TimingMiddleware, gauge_lines, metrics_enabled, registry
+from .migrations import check_schema, upgrade
+from .prompt_context import encode_context
+from .responses import default_response_class, rows_response
+from .scheduler import start_scheduler, stop_scheduler
 
 
 load_dotenv()
 
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Hackathon Backend", debug=True)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema changes are applied offline with `python -m backend.migrations upgrade`.
+    if os.getenv("DB_AUTO_MIGRATE") == "1":
+        upgrade(engine)
+    else:
+        check_schema(engine)
+    await start_gemini_client()
+    scheduler_tasks = start_scheduler()
+    yield
+    await stop_scheduler(scheduler_tasks)
+    await close_gemini_client()
+    hash_pool.shutdown()
+    await async_engine.dispose()
+
+
+app = FastAPI(
+    title="Hackathon Backend",
+    debug=True,
+    lifespan=lifespan,
+    default_response_class=default_response_class(),
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -52,7 +105,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-State-Version", "X-Next-Cursor"],
 )
+app.add_middleware(TimingMiddleware)
+
+
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _numeric(stats: dict) -> dict:
+    return {key: value for key, value in stats.items() if isinstance(value, (int, float)) and not isinstance(value, bool)}
+
+
+def _component_metrics() -> list[str]:
+    breaker_stats = breaker.stats()
+    breaker_stats["state"] = BREAKER_STATES[breaker_stats["state"]]
+    return (
+        gauge_lines("auth_user_cache", "Auth user cache counters.", _numeric(user_cache.stats()))
+        + gauge_lines("coach_cache", "Coach reply cache counters.", _numeric(coach_cache.stats()))
+        + gauge_lines(
+            "gemini_breaker", "Gemini circuit breaker (state: 0 closed, 1 half-open, 2 open).", _numeric(breaker_stats)
+        )
+    )
+
+
+registry.collectors.append(_component_metrics)
 
 
 @app.get("/health")
@@ -61,60 +138,79 @@ def health():
 
 
 @app.post("/auth/signup", response_model=TokenOut)
-def signup(payload: AuthIn, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == payload.email).first()
+async def signup(payload: AuthIn, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(User.id).where(User.email == payload.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered.")
-    user = User(email=payload.email, password_hash=hash_password(payload.password))
+    password_hash = await hash_password_async(payload.password)
+    user = User(email=payload.email, password_hash=password_hash)
     db.add(user)
-    db.commit()
-    db.refresh(user)
-    settings = Settings(user_id=user.id)
-    db.add(settings)
-    db.commit()
+    await db.flush()
+    db.add(Settings(user_id=user.id))
+    await db.commit()
     token = create_access_token({"sub": str(user.id), "email": user.email})
     return TokenOut(access_token=token)
 
 
 @app.post("/auth/login", response_model=TokenOut)
-def login(payload: AuthIn, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+async def login(payload: AuthIn, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == payload.email))
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password.")
+    ok, new_hash = await verify_password_async(payload.password, user.password_hash)
+    if not ok:
+        raise HTTPException(status_code=401, detail="Invalid email or password.")
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was written; upgrade it transparently.
+        user.password_hash = new_hash
+        await db.commit()
     token = create_access_token({"sub": str(user.id), "email": user.email})
     return TokenOut(access_token=token)
 
 
 @app.post("/month/start", response_model=MonthStateOut)
-def month_start(
+async def month_start(
     payload: MonthStartIn,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    month = get_or_create_month(db, user.id, payload.income, payload.ratio)
+    month = await get_or_create_month_async(db, user.id, payload.income, payload.ratio)
+    await coach_cache.invalidate_user(user.id)
     return MonthStateOut(**compute_month_state(month))
 
 
 @app.get("/month/state", response_model=MonthStateOut)
-def month_state(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def month_state(
+    request: Request,
+    response: Response,
+    user: CurrentUser = Depends(get_current_user_claims),
+    db: AsyncSession = Depends(get_async_db),
+):
     today = datetime.utcnow().date()
-    month = (
-        db.query(Month)
-        .filter_by(user_id=user.id, year=today.year, month=today.month)
-        .first()
-    )
-    if not month:
-        raise HTTPException(status_code=400, detail="Start the month first with /month/start.")
-    return MonthStateOut(**compute_month_state(month))
+    snapshot = month_state_cache.get(user.id, today.year, today.month)
+    if snapshot is None:
+        generation = month_state_cache.generation(user.id)
+        month = await db.scalar(
+            select(Month).filter_by(user_id=user.id, year=today.year, month=today.month)
+        )
+        if not month:
+            raise HTTPException(status_code=400, detail="Start the month first with /month/start.")
+        snapshot = month_state_cache.store(user.id, month, generation)
+    headers = {"ETag": snapshot.etag, "X-State-Version": str(snapshot.version)}
+    if_none_match = request.headers.get("if-none-match", "")
+    if snapshot.etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return MonthStateOut(**snapshot.state)
 
 
 @app.post("/tasks/template", response_model=TaskTemplateOut)
-def create_template(
+async def create_template(
     payload: TaskTemplateIn,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    settings = db.query(Settings).filter(Settings.user_id == user.id).first()
+    settings = await db.get(Settings, user.id)
     exp_value = payload.exp_value
     if exp_value is None:
         exp_value = default_exp_for_difficulty(settings, payload.difficulty)
@@ -130,79 +226,183 @@ def create_template(
         active=payload.active,
     )
     db.add(template)
-    db.commit()
-    db.refresh(template)
+    await db.commit()
+    await db.refresh(template)
     data = TaskTemplateOut.from_orm(template)
     if template.schedule_meta:
         data.schedule_meta = json.loads(template.schedule_meta)
     return data
 
 
+@app.post("/tasks/templates/import")
+async def import_templates(
+    request: Request,
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await import_task_templates(db, user.id, request.stream(), request.headers.get("content-type", ""))
+
+
 @app.post("/tasks/generate")
-def generate_tasks(
+async def generate_tasks(
     date: str = Query(..., description="YYYY-MM-DD"),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
         target_date = datetime.strptime(date, "%Y-%m-%d").date()
     except ValueError as exc:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.") from exc
-    created = generate_task_instances(db, user.id, target_date)
+    created = await generate_task_instances_async(db, user.id, target_date)
     return {"date": date, "created": created}
 
 
+@app.post("/tasks/generate_range")
+async def generate_tasks_range(
+    start: str = Query(..., description="YYYY-MM-DD"),
+    end: str = Query(..., description="YYYY-MM-DD"),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        start_date = datetime.strptime(start, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end, "%Y-%m-%d").date()
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.") from exc
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="End date must not be before start date.")
+    if (end_date - start_date).days + 1 > MAX_GENERATE_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {MAX_GENERATE_RANGE_DAYS} days.",
+        )
+    created = await generate_task_instances_range_async(db, user.id, start_date, end_date)
+    return {"start": start, "end": end, "created": created}
+
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+TASK_INSTANCE_COLUMNS = {
+    "id": TaskInstance.id,
+    "template_id": TaskInstance.template_id,
+    "date": TaskInstance.date,
+    "status": TaskInstance.status,
+    "completion_note": TaskInstance.completion_note,
+    "completed_at": TaskInstance.completed_at,
+    "title": TaskTemplate.title,
+    "category": TaskTemplate.category,
+    "difficulty": TaskTemplate.difficulty,
+    "exp_value": TaskTemplate.exp_value,
+}
+
+SHOP_ITEM_COLUMNS = {
+    "id": ShopItem.id,
+    "name": ShopItem.name,
+    "tier": ShopItem.tier,
+    "exp_cost": ShopItem.exp_cost,
+    "cash_price": ShopItem.cash_price,
+    "category": ShopItem.category,
+    "active": ShopItem.active,
+}
+
+
+def _encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode("ascii")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str | None) -> int | None:
+    if not cursor:
+        return None
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii"))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor.") from exc
+
+
+def _projected_columns(columns: dict, fields: str | None) -> list:
+    names = list(columns)
+    if fields:
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = sorted(set(requested) - columns.keys())
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}.")
+        # id is always returned; it is the pagination key.
+        names = ["id"] + [name for name in requested if name != "id"]
+    return [columns[name].label(name) for name in names]
+
+
+async def _keyset_page(db: AsyncSession, query, id_column, cursor: str | None, limit: int | None):
+    # Callers that pass neither cursor nor limit (the web client) get the full list.
+    if cursor is None and limit is None:
+        result = await db.execute(query.order_by(id_column))
+        return rows_response(list(result.keys()), result.all())
+    limit = limit or DEFAULT_PAGE_LIMIT
+    after_id = _decode_cursor(cursor)
+    if after_id is not None:
+        query = query.where(id_column > after_id)
+    result = await db.execute(query.order_by(id_column).limit(limit + 1))
+    keys = list(result.keys())
+    rows = result.all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1][0])
+    return rows_response(keys, rows, headers=headers)
+
+
 @app.get("/tasks/instances", response_model=list[TaskInstanceOut])
-def list_instances(
+async def list_instances(
     date: str = Query(..., description="YYYY-MM-DD"),
     status: str | None = None,
     difficulty: str | None = None,
     category: str | None = None,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_LIMIT, description="Page size; paginates when set"),
+    fields: str | None = Query(None, description="Comma-separated subset of fields to return"),
+    user: CurrentUser = Depends(get_current_user_claims),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
         datetime.strptime(date, "%Y-%m-%d")
     except ValueError as exc:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.") from exc
     query = (
-        db.query(TaskInstance, TaskTemplate)
+        select(*_projected_columns(TASK_INSTANCE_COLUMNS, fields))
+        .select_from(TaskInstance)
         .join(TaskTemplate, TaskInstance.template_id == TaskTemplate.id)
-        .filter(TaskInstance.user_id == user.id, TaskInstance.date == date)
+        .where(TaskInstance.user_id == user.id, TaskInstance.date == date)
     )
     if status:
-        query = query.filter(TaskInstance.status == status)
+        query = query.where(TaskInstance.status == status)
     if difficulty:
-        query = query.filter(TaskTemplate.difficulty == difficulty)
+        query = query.where(TaskTemplate.difficulty == difficulty)
     if category:
-        query = query.filter(TaskTemplate.category == category)
-    results = []
-    for instance, template in query.all():
-        results.append(
-            TaskInstanceOut(
-                id=instance.id,
-                template_id=instance.template_id,
-                date=instance.date,
-                status=instance.status,
-                completion_note=instance.completion_note,
-                completed_at=instance.completed_at,
-                title=template.title,
-                category=template.category,
-                difficulty=template.difficulty,
-                exp_value=template.exp_value,
-            )
-        )
-    return results
+        query = query.where(TaskTemplate.category == category)
+    return await _keyset_page(db, query, TaskInstance.id, cursor, limit)
+
+
+@app.post("/tasks/instances/complete_batch")
+async def complete_instances_batch(
+    payload: CompleteTaskBatchIn,
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    items = [(item.instance_id, item.note) for item in payload.items]
+    results, month_state = await complete_task_instances_batch_async(db, user.id, items)
+    await coach_cache.invalidate_user(user.id)
+    return {"results": results, "month_state": month_state}
 
 
 @app.post("/tasks/instances/{instance_id}/complete")
-def complete_instance(
+async def complete_instance(
     instance_id: int,
     payload: CompleteTaskIn,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    instance, awarded = complete_task_instance(db, user.id, instance_id, payload.note)
+    instance, awarded = await complete_task_instance_async(db, user.id, instance_id, payload.note)
+    await coach_cache.invalidate_user(user.id)
     return {
         "id": instance.id,
         "status": instance.status,
@@ -211,20 +411,20 @@ def complete_instance(
 
 
 @app.post("/tasks/instances/{instance_id}/skip")
-def skip_instance(
+async def skip_instance(
     instance_id: int,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    instance = skip_task_instance(db, user.id, instance_id)
+    instance = await skip_task_instance_async(db, user.id, instance_id)
     return {"id": instance.id, "status": instance.status}
 
 
 @app.post("/shop/item", response_model=ShopItemOut)
-def create_shop_item(
+async def create_shop_item(
     payload: ShopItemIn,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     exp_cost = payload.exp_cost if payload.exp_cost is not None else payload.tier
     item = ShopItem(
@@ -237,49 +437,74 @@ def create_shop_item(
         active=payload.active,
     )
     db.add(item)
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    await db.refresh(item)
+    await coach_cache.invalidate_user(user.id)
     return ShopItemOut.from_orm(item)
 
 
+@app.post("/shop/items/import")
+async def import_items(
+    request: Request,
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    result = await import_shop_items(db, user.id, request.stream(), request.headers.get("content-type", ""))
+    if result["imported"]:
+        await coach_cache.invalidate_user(user.id)
+    return result
+
+
 @app.get("/shop/items", response_model=list[ShopItemOut])
-def list_shop_items(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def list_shop_items(
+    cursor: str | None = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_LIMIT, description="Page size; paginates when set"),
+    fields: str | None = Query(None, description="Comma-separated subset of fields to return"),
+    user: CurrentUser = Depends(get_current_user_claims),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    items = db.query(ShopItem).filter(ShopItem.user_id == user.id).all()
-    return [ShopItemOut.from_orm(item) for item in items]
+    query = select(*_projected_columns(SHOP_ITEM_COLUMNS, fields)).where(ShopItem.user_id == user.id)
+    return await _keyset_page(db, query, ShopItem.id, cursor, limit)
 
 
 @app.post("/shop/purchase/{item_id}")
-def purchase(
+async def purchase(
     item_id: int,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    ok, reason = can_purchase(db, user.id, item_id)
-    if not ok:
-        raise HTTPException(status_code=400, detail=reason)
-    purchase_row = purchase_item(db, user.id, item_id)
-    month_state = compute_month_state(
-        db.query(Month).filter_by(id=purchase_row.month_id).first()
-    )
+    purchase_row, month_state = await purchase_item_async(db, user.id, item_id)
+    await coach_cache.invalidate_user(user.id)
     return {
         "purchase": PurchaseOut.from_orm(purchase_row),
         "month_state": month_state,
     }
 
 
-@app.post("/chat/message", response_model=ChatOut)
-async def chat_message(
-    payload: ChatMessageIn,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+@app.get("/analytics/history")
+async def analytics_history(
+    months: int | None = Query(None, ge=1, le=600, description="Only the most recent N months"),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    # Inject budget context here so the model can advise without enforcing logic.
-    context_json = build_chat_context(db, user.id)
+    return await build_history_async(db, user.id, months)
+
+
+@app.get("/export")
+async def export_data(user: CurrentUser = Depends(get_current_user)):
+    return StreamingResponse(
+        export_user_data(user.id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="export.ndjson"'},
+    )
+
+
+SPEND_ADVICE_MESSAGE = "Is it wise to buy the selected item now? Provide brief advice."
+
+
+def _coach_prompt(context_json: dict, user_message: str) -> str:
     # Gemini is advisory only; all enforcement stays in backend logic.
-    prompt = (
+    return (
         "You are the in-app Spending Coach for a gamified budgeting app.\n"
         "You MUST use only APP_CONTEXT below.\n"
         "If information is missing, ask ONE clarifying question.\n"
@@ -288,27 +513,18 @@ async def chat_message(
         "You are advisory-only: never approve purchases or change balances.\n"
         "Keep replies under 4 sentences.\n"
         "You MUST reference at least one number from APP_CONTEXT in your answer.\n\n"
-        f"APP_CONTEXT:\n{json.dumps(context_json, indent=2)}\n\n"
-        f"USER_MESSAGE:\n{payload.message}"
+        f"APP_CONTEXT:\n{encode_context(context_json)}\n\n"
+        f"USER_MESSAGE:\n{user_message}"
     )
-    response = await gemini_chat(prompt)
-    return ChatOut(response=response)
 
 
-@app.post("/chat/spend_advice", response_model=ChatOut)
-async def chat_spend_advice(
-    payload: ChatSpendAdviceIn,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    item = (
-        db.query(ShopItem)
-        .filter(ShopItem.user_id == user.id, ShopItem.id == payload.item_id)
-        .first()
+async def _spend_advice_context(db: AsyncSession, user_id: int, item_id: int) -> dict:
+    item = await db.scalar(
+        select(ShopItem).where(ShopItem.user_id == user_id, ShopItem.id == item_id)
     )
     if not item:
         raise HTTPException(status_code=404, detail="Item not found.")
-    context_json = build_chat_context(db, user.id)
+    context_json = await build_chat_context_async(db, user_id)
     context_json["selected_item"] = {
         "id": item.id,
         "name": item.name,
@@ -317,27 +533,109 @@ async def chat_spend_advice(
         "cash_price": item.cash_price,
         "category": item.category,
     }
-    prompt = (
-        "You are the in-app Spending Coach for a gamified budgeting app.\n"
-        "You MUST use only APP_CONTEXT below.\n"
-        "If information is missing, ask ONE clarifying question.\n"
-        "Do NOT guess numbers.\n"
-        "Do NOT output JSON, code, or mention endpoints/DB/tokens/variables.\n"
-        "You are advisory-only: never approve purchases or change balances.\n"
-        "Keep replies under 4 sentences.\n"
-        "You MUST reference at least one number from APP_CONTEXT in your answer.\n\n"
-        f"APP_CONTEXT:\n{json.dumps(context_json, indent=2)}\n\n"
-        "USER_MESSAGE:\nIs it wise to buy the selected item now? Provide brief advice."
+    return context_json
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _coach_event_stream(prompt: str, user_id: int | None = None, cache_key: str | None = None):
+    started = time.perf_counter()
+    first_token_ms = None
+    parts = []
+    failed = False
+    try:
+        async for text in gemini_chat_stream(prompt):
+            if first_token_ms is None:
+                first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+            parts.append(text)
+            yield _sse_event("token", {"text": text})
+    except Exception:
+        failed = True
+        yield _sse_event("error", {"detail": "The coach stopped responding."})
+    total_ms = round((time.perf_counter() - started) * 1000, 1)
+    reply = "".join(parts)
+    if cache_key and not failed and is_upstream_reply(reply, prompt):
+        await coach_cache.put(cache_key, user_id, reply, total_ms)
+    yield _sse_event("done", {"ttft_ms": first_token_ms, "total_ms": total_ms, "cached": False})
+
+
+async def _cached_event_stream(reply: str):
+    yield _sse_event("token", {"text": reply})
+    yield _sse_event("done", {"ttft_ms": 0.0, "total_ms": 0.0, "cached": True})
+
+
+def _coach_stream_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
+
+
+@app.post("/chat/message", response_model=ChatOut)
+async def chat_message(
+    payload: ChatMessageIn,
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Inject budget context here so the model can advise without enforcing logic.
+    context_json = await build_chat_context_async(db, user.id)
+    response = await gemini_chat(_coach_prompt(context_json, payload.message))
+    return ChatOut(response=response)
+
+
+@app.post("/chat/message/stream")
+async def chat_message_stream(
+    payload: ChatMessageIn,
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    context_json = await build_chat_context_async(db, user.id)
+    return _coach_stream_response(_coach_event_stream(_coach_prompt(context_json, payload.message)))
+
+
+@app.post("/chat/spend_advice", response_model=ChatOut)
+async def chat_spend_advice(
+    payload: ChatSpendAdviceIn,
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    context_json = await _spend_advice_context(db, user.id, payload.item_id)
+    # Repeated taps on the same item with unchanged month state produce identical prompts.
+    cache_key = coach_cache.key(user.id, context_json, SPEND_ADVICE_MESSAGE)
+    cached = await coach_cache.get(cache_key)
+    if cached is not None:
+        return ChatOut(response=cached)
+    started = time.perf_counter()
+    prompt = _coach_prompt(context_json, SPEND_ADVICE_MESSAGE)
     response = await gemini_chat(prompt)
+    if is_upstream_reply(response, prompt):
+        await coach_cache.put(cache_key, user.id, response, (time.perf_counter() - started) * 1000)
     return ChatOut(response=response)
 
 
+@app.post("/chat/spend_advice/stream")
+async def chat_spend_advice_stream(
+    payload: ChatSpendAdviceIn,
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    context_json = await _spend_advice_context(db, user.id, payload.item_id)
+    cache_key = coach_cache.key(user.id, context_json, SPEND_ADVICE_MESSAGE)
+    cached = await coach_cache.get(cache_key)
+    if cached is not None:
+        return _coach_stream_response(_cached_event_stream(cached))
+    prompt = _coach_prompt(context_json, SPEND_ADVICE_MESSAGE)
+    return _coach_stream_response(_coach_event_stream(prompt, user.id, cache_key))
+
+
 @app.get("/chat/context")
-def chat_context(
+async def chat_context(
     date: str | None = None,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     if os.getenv("DEBUG_CHAT_CONTEXT") != "1":
         raise HTTPException(status_code=404, detail="Not found.")
@@ -346,4 +644,25 @@ def chat_context(
             datetime.strptime(date, "%Y-%m-%d")
         except ValueError as exc:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.") from exc
-    return build_chat_context(db, user.id, date_str=date)
+    return await build_chat_context_async(db, user.id, date_str=date)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    if not metrics_enabled():
+        raise HTTPException(status_code=404, detail="Not found.")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/auth/cache_stats")
+def auth_cache_stats():
+    if os.getenv("DEBUG_AUTH_CACHE") != "1":
+        raise HTTPException(status_code=404, detail="Not found.")
+    return user_cache.stats()
+
+
+@app.get("/chat/cache_stats")
+def chat_cache_stats():
+    if os.getenv("DEBUG_COACH_CACHE") != "1":
+        raise HTTPException(status_code=404, detail="Not found.")
+    return coach_cache.stats()
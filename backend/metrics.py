@@ -0,0 +1,211 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def metrics_enabled() -> bool:
+    # Off by default like the other diagnostics endpoints; /metrics exposes per-route traffic.
+    return os.getenv("METRICS_ENABLED", "0") == "1"
+
+
+def _server_timing_enabled() -> bool:
+    return os.getenv("SERVER_TIMING_ENABLED", "1") == "1"
+
+
+class RequestTimings:
+    __slots__ = ("started", "db_queries", "db_seconds", "llm_calls", "llm_seconds")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        total = self.elapsed()
+        app = max(total - self.db_seconds - self.llm_seconds, 0.0)
+        return ", ".join(
+            [
+                f"total;dur={total * 1000:.1f}",
+                f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"',
+                f"llm;dur={self.llm_seconds * 1000:.1f}",
+                f"app;dur={app * 1000:.1f}",
+            ]
+        )
+
+
+# The object is mutated in place, so work in copied contexts (run_sync greenlets,
+# asyncio.to_thread) still adds to the request that started it.
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.observations = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.observations += 1
+
+
+class _Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[Tuple[str, str], _Histogram] = {}
+        self.queries: Dict[Tuple[str, str], _Histogram] = {}
+        self.db_seconds: Dict[Tuple[str, str], float] = {}
+        self.llm = _Histogram(LATENCY_BUCKETS)
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def observe_request(self, method: str, route: str, status: int, timings: RequestTimings) -> None:
+        key = (method, route)
+        with self._lock:
+            status_key = (method, route, str(status))
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            self.latency.setdefault(key, _Histogram(LATENCY_BUCKETS)).observe(timings.elapsed())
+            self.queries.setdefault(key, _Histogram(QUERY_COUNT_BUCKETS)).observe(timings.db_queries)
+            self.db_seconds[key] = self.db_seconds.get(key, 0.0) + timings.db_seconds
+
+    def observe_llm(self, seconds: float) -> None:
+        with self._lock:
+            self.llm.observe(seconds)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Requests by method, route and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+            lines += _render_histograms(
+                "http_request_duration_seconds", "Request wall time.", self.latency
+            )
+            lines += _render_histograms(
+                "db_queries_per_request", "Database queries issued per request.", self.queries
+            )
+            lines += [
+                "# HELP db_query_duration_seconds_total Time spent in database queries.",
+                "# TYPE db_query_duration_seconds_total counter",
+            ]
+            for (method, route), seconds in sorted(self.db_seconds.items()):
+                lines.append(f'db_query_duration_seconds_total{{method="{method}",route="{route}"}} {seconds:.6f}')
+            lines += _render_histograms("llm_request_duration_seconds", "Upstream Gemini call time.", {(): self.llm})
+        for collect in self.collectors:
+            lines += collect()
+        return "\n".join(lines) + "\n"
+
+
+def _labels(key: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(("method", "route"), key)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _render_histograms(name: str, help_text: str, histograms: Dict[tuple, _Histogram]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, hist in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(hist.buckets, hist.counts):
+            cumulative += count
+            le = f'le="{bound}"'
+            lines.append(f"{name}_bucket{_labels(key, le)} {cumulative}")
+        le = 'le="+Inf"'
+        lines.append(f"{name}_bucket{_labels(key, le)} {hist.observations}")
+        lines.append(f"{name}_sum{_labels(key)} {hist.total:.6f}")
+        lines.append(f"{name}_count{_labels(key)} {hist.observations}")
+    return lines
+
+
+registry = _Registry()
+
+
+def gauge_lines(name: str, help_text: str, values: Dict[str, float]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    lines += [f'{name}{{key="{key}"}} {value}' for key, value in sorted(values.items())]
+    return lines
+
+
+def record_query(seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.db_queries += 1
+        timings.db_seconds += seconds
+
+
+def record_llm(seconds: float) -> None:
+    # Streaming replies finish after the response headers; they still reach the histogram.
+    timings = _current.get()
+    if timings is not None:
+        timings.llm_calls += 1
+        timings.llm_seconds += seconds
+    registry.observe_llm(seconds)
+
+
+class TimingMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware so streaming bodies are not buffered and the
+    # request is observed when its last body chunk has been sent.
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            app = scope.get("app")
+            for candidate in getattr(app, "routes", []):
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = candidate.path
+                    break
+            route = self._routes[endpoint] = route or "unmatched"
+        return route
+
+    async def __call__(self, scope, receive, send):
+        collect = metrics_enabled()
+        if scope["type"] != "http" or not (collect or _server_timing_enabled()):
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = 500
+        # With METRICS_ENABLED off only the Server-Timing header is produced.
+        observed = not collect
+
+        async def send_with_timing(message):
+            nonlocal status, observed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if _server_timing_enabled():
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and not observed:
+                observed = True
+                registry.observe_request(scope["method"], self._route(scope), status, timings)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if not observed:
+                registry.observe_request(scope["method"], self._route(scope), status, timings)
+            _current.reset(token)
@@ -0,0 +1,230 @@
+import argparse
+from typing import Callable, List, Tuple
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    inspect,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+
+from .db import engine as default_engine
+
+
+# Revision 1 schema, frozen as it shipped. Later revisions add to it; changes to the models
+# must come with a new revision rather than an edit here.
+_baseline = MetaData()
+
+Table(
+    "users",
+    _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("password_hash", String, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+
+Table(
+    "settings",
+    _baseline,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("easy_exp", Integer, nullable=False),
+    Column("med_exp", Integer, nullable=False),
+    Column("hard_exp", Integer, nullable=False),
+    Column("tier_low", Integer, nullable=False),
+    Column("tier_mid", Integer, nullable=False),
+    Column("tier_high", Integer, nullable=False),
+)
+
+Table(
+    "months",
+    _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+    Column("year", Integer, nullable=False),
+    Column("month", Integer, nullable=False),
+    Column("income", Float, nullable=False),
+    Column("ratio", Float, nullable=False),
+    Column("needs_planned", Float, nullable=False),
+    Column("savings_planned", Float, nullable=False),
+    Column("psp_total", Float, nullable=False),
+    Column("cash_spent", Float, nullable=False),
+    Column("exp_earned", Float, nullable=False),
+    Column("exp_redeemed", Float, nullable=False),
+    Column("savings_actual", Float, nullable=False),
+    UniqueConstraint("user_id", "year", "month", name="uniq_user_month"),
+)
+
+Table(
+    "task_templates",
+    _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+    Column("title", String, nullable=False),
+    Column("category", String, nullable=True),
+    Column("difficulty", String, nullable=False),
+    Column("exp_value", Integer, nullable=False),
+    Column("schedule_type", String, nullable=False),
+    Column("schedule_meta", Text, nullable=True),
+    Column("active", Boolean, nullable=False),
+)
+
+Table(
+    "task_instances",
+    _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+    Column("template_id", Integer, ForeignKey("task_templates.id"), nullable=False),
+    Column("date", String, nullable=False),
+    Column("status", String, nullable=False),
+    Column("completion_note", Text, nullable=True),
+    Column("completed_at", DateTime, nullable=True),
+    UniqueConstraint("user_id", "template_id", "date", name="uniq_user_template_date"),
+)
+
+Table(
+    "shop_items",
+    _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+    Column("name", String, nullable=False),
+    Column("tier", Integer, nullable=False),
+    Column("exp_cost", Integer, nullable=False),
+    Column("cash_price", Float, nullable=False),
+    Column("category", String, nullable=True),
+    Column("active", Boolean, nullable=False),
+)
+
+Table(
+    "purchases",
+    _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+    Column("month_id", Integer, ForeignKey("months.id"), nullable=False),
+    Column("item_id", Integer, ForeignKey("shop_items.id"), nullable=False),
+    Column("exp_spent", Float, nullable=False),
+    Column("cash_spent", Float, nullable=False),
+    Column("purchased_at", DateTime, nullable=False),
+)
+
+
+def _create_base_tables(conn: Connection) -> None:
+    # Databases created before migrations existed already have these; checkfirst skips them.
+    _baseline.create_all(bind=conn, checkfirst=True)
+
+
+def _create_index(name: str, table: str, columns: str) -> Callable[[Connection], None]:
+    def apply(conn: Connection) -> None:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+    return apply
+
+
+def _composite_indexes(conn: Connection) -> None:
+    _create_index("ix_task_instances_user_date", "task_instances", "user_id, date")(conn)
+    _create_index("ix_shop_items_user_active", "shop_items", "user_id, active")(conn)
+
+
+def _add_column(table: str, column: str, ddl: str) -> Callable[[Connection], None]:
+    def apply(conn: Connection) -> None:
+        # Databases that were created by Base.metadata.create_all before this revision
+        # existed may already have the column.
+        if column not in {col["name"] for col in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+    return apply
+
+
+def _month_rollover(conn: Connection) -> None:
+    _add_column("months", "closed_at", "TIMESTAMP")(conn)
+    _create_index("ix_months_period_user", "months", "year, month, user_id")(conn)
+
+
+# Append-only: never edit or reorder a revision once it has shipped.
+REVISIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "base tables", _create_base_tables),
+    (2, "composite indexes for hot queries", _composite_indexes),
+    (
+        3,
+        "covering index for purchase history",
+        _create_index(
+            "ix_purchases_history", "purchases", "user_id, month_id, item_id, cash_spent, exp_spent"
+        ),
+    ),
+    (4, "month rollover columns and index", _month_rollover),
+]
+
+HEAD = REVISIONS[-1][0]
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    version = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+    return int(version or 0)
+
+
+def upgrade(engine: Engine = default_engine, target: int = HEAD) -> List[int]:
+    applied = []
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    for version, _description, apply in REVISIONS:
+        if version > target:
+            break
+        # One transaction per revision so a failure leaves the last good version recorded.
+        with engine.begin() as conn:
+            if version <= current_version(conn):
+                continue
+            apply(conn)
+            conn.execute(text("DELETE FROM schema_version"))
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": version})
+        applied.append(version)
+    return applied
+
+
+def check_schema(engine: Engine = default_engine) -> None:
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version < HEAD:
+        raise SchemaOutOfDate(
+            f"Database schema is at revision {version}, expected {HEAD}. "
+            "Run `python -m backend.migrations upgrade`."
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the database schema.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    up = sub.add_parser("upgrade", help="Apply pending revisions.")
+    up.add_argument("--to", type=int, default=HEAD, help="Target revision (default: head).")
+    sub.add_parser("current", help="Show the current revision.")
+    sub.add_parser("history", help="List all revisions.")
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        applied = upgrade(default_engine, args.to)
+        print(f"Applied revisions: {applied}" if applied else "Already up to date.")
+    elif args.command == "current":
+        with default_engine.connect() as conn:
+            print(f"{current_version(conn)} (head: {HEAD})")
+    else:
+        for version, description, _apply in REVISIONS:
+            print(f"{version}: {description}")
+
+
+if __name__ == "__main__":
+    main()
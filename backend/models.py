@@ -7,6 +7,7 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
     Text,
     UniqueConstraint,
 )
@@ -42,7 +43,10 @@ class Settings(Base):
 
 class Month(Base):
     __tablename__ = "months"
-    __table_args__ = (UniqueConstraint("user_id", "year", "month", name="uniq_user_month"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "year", "month", name="uniq_user_month"),
+        Index("ix_months_period_user", "year", "month", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -57,6 +61,7 @@ class Month(Base):
     exp_earned = Column(Float, nullable=False, default=0.0)
     exp_redeemed = Column(Float, nullable=False, default=0.0)
     savings_actual = Column(Float, nullable=False, default=0.0)
+    closed_at = Column(DateTime, nullable=True)
 
 
 class TaskTemplate(Base):
@@ -77,6 +82,7 @@ class TaskInstance(Base):
     __tablename__ = "task_instances"
     __table_args__ = (
         UniqueConstraint("user_id", "template_id", "date", name="uniq_user_template_date"),
+        Index("ix_task_instances_user_date", "user_id", "date"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -92,6 +98,7 @@ class TaskInstance(Base):
 
 class ShopItem(Base):
     __tablename__ = "shop_items"
+    __table_args__ = (Index("ix_shop_items_user_active", "user_id", "active"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -105,6 +112,10 @@ class ShopItem(Base):
 
 class Purchase(Base):
     __tablename__ = "purchases"
+    # Covers the /analytics/history aggregate so it never touches the table itself.
+    __table_args__ = (
+        Index("ix_purchases_history", "user_id", "month_id", "item_id", "cash_spent", "exp_spent"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -0,0 +1,96 @@
+import copy
+import json
+import os
+from typing import Callable, List, Optional
+
+# Month-state fields the coach (and the offline fallback in gemini.py) always relies on.
+ESSENTIAL_MONTH_FIELDS = (
+    "year",
+    "month",
+    "cash_available",
+    "exp_available",
+    "exp_cap",
+    "cash_spent",
+    "locked_cash",
+    "projected_rollover_to_savings",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English and JSON punctuation.
+    return (len(text) + 3) // 4
+
+
+def _minify(context: dict) -> str:
+    return json.dumps(context, separators=(",", ":"), ensure_ascii=False)
+
+
+def compact_context(context: dict) -> dict:
+    compact = copy.deepcopy(context)
+    month_state = compact.get("month_state")
+    if isinstance(month_state, dict):
+        # Every pie slice repeats a top-level month_state number.
+        month_state.pop("pie", None)
+    if compact.get("settings") is None:
+        compact.pop("settings", None)
+    return compact
+
+
+def _drop_rules(ctx: dict) -> bool:
+    return ctx.pop("rules", None) is not None
+
+
+def _drop_settings(ctx: dict) -> bool:
+    return ctx.pop("settings", None) is not None
+
+
+def _trim_list(path: List[str]) -> Callable[[dict], bool]:
+    def trim(ctx: dict) -> bool:
+        node = ctx
+        for key in path[:-1]:
+            node = node.get(key) or {}
+        items = node.get(path[-1])
+        if not items:
+            return False
+        items.pop()
+        return True
+
+    return trim
+
+
+def _drop_optional_month_fields(ctx: dict) -> bool:
+    month_state = ctx.get("month_state") or {}
+    extra = [key for key in month_state if key not in ESSENTIAL_MONTH_FIELDS]
+    for key in extra:
+        del month_state[key]
+    return bool(extra)
+
+
+# Lowest-value sections first; the selected item and task counts are never trimmed.
+TRIM_STEPS = [
+    _drop_rules,
+    _drop_settings,
+    _trim_list(["shop_summary", "suggested_items"]),
+    _trim_list(["task_summary", "next_tasks"]),
+    _drop_optional_month_fields,
+]
+
+
+def _token_budget() -> Optional[int]:
+    budget = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "0"))
+    return budget if budget > 0 else None
+
+
+def encode_context(context: dict, token_budget: Optional[int] = None) -> str:
+    if token_budget is None:
+        token_budget = _token_budget()
+    ctx = compact_context(context)
+    encoded = _minify(ctx)
+    if not token_budget:
+        return encoded
+    for step in TRIM_STEPS:
+        while estimate_tokens(encoded) > token_budget and step(ctx):
+            encoded = _minify(ctx)
+        if estimate_tokens(encoded) <= token_budget:
+            break
+    return encoded
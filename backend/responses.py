@@ -0,0 +1,43 @@
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Sequence
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder below produces the same JSON
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    # Renders plain dicts/lists of column values directly, without jsonable_encoder.
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def default_response_class() -> type[JSONResponse]:
+    return FastJSONResponse if os.getenv("FAST_JSON", "0") == "1" else JSONResponse
+
+
+def rows_response(keys: Sequence[str], rows: Sequence[tuple], headers: dict | None = None) -> FastJSONResponse:
+    # List endpoints hand over row tuples; no per-row Pydantic model is built.
+    return FastJSONResponse([dict(zip(keys, row)) for row in rows], headers=headers)
@@ -0,0 +1,116 @@
+import argparse
+import logging
+import os
+import time
+from datetime import date, datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+
+from .db import SessionLocal
+from .logic import close_months, next_month
+from .models import Month
+
+
+logger = logging.getLogger(__name__)
+
+
+class RolloverReport(NamedTuple):
+    year: int
+    month: int
+    users: int
+    closed: int
+    opened: int
+    seconds: float
+
+    @property
+    def users_per_sec(self) -> float:
+        return round(self.users / self.seconds, 1) if self.seconds else 0.0
+
+
+def _batch_size() -> int:
+    return max(int(os.getenv("MONTH_ROLLOVER_BATCH_SIZE", "500")), 1)
+
+
+def previous_month(today: date) -> Tuple[int, int]:
+    return (today.year - 1, 12) if today.month == 1 else (today.year, today.month - 1)
+
+
+def _open_user_ids(db, year: int, month: int, after_user_id: int, limit: int) -> List[int]:
+    return list(
+        db.scalars(
+            select(Month.user_id)
+            .where(
+                Month.year == year,
+                Month.month == month,
+                Month.closed_at.is_(None),
+                Month.user_id > after_user_id,
+            )
+            .order_by(Month.user_id)
+            .limit(limit)
+        )
+    )
+
+
+def run_rollover(year: int, month: int, batch_size: Optional[int] = None) -> RolloverReport:
+    # Each chunk commits on its own and only unclosed months are picked up, so an interrupted
+    # run resumes where it stopped and a repeated run does nothing.
+    batch_size = batch_size or _batch_size()
+    started = time.perf_counter()
+    users = closed = opened = 0
+    after_user_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            user_ids = _open_user_ids(db, year, month, after_user_id, batch_size)
+            if not user_ids:
+                break
+            chunk_closed, chunk_opened = close_months(db, user_ids, year, month)
+            users += len(user_ids)
+            closed += chunk_closed
+            opened += chunk_opened
+            after_user_id = user_ids[-1]
+    finally:
+        db.close()
+    report = RolloverReport(year, month, users, closed, opened, round(time.perf_counter() - started, 3))
+    logger.info(
+        "Month rollover %04d-%02d: closed %s, opened %s next months, %s users in %ss (%s users/sec)",
+        year,
+        month,
+        report.closed,
+        report.opened,
+        report.users,
+        report.seconds,
+        report.users_per_sec,
+    )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Close a month for all users and open the next one.")
+    parser.add_argument("--month", help="YYYY-MM to close (default: the previous UTC month).")
+    parser.add_argument("--batch-size", type=int, default=None, help="Users per transaction.")
+    args = parser.parse_args()
+
+    if args.month:
+        try:
+            target = datetime.strptime(args.month, "%Y-%m")
+        except ValueError:
+            parser.error("--month must be YYYY-MM")
+        year, month = target.year, target.month
+    else:
+        year, month = previous_month(datetime.utcnow().date())
+    today = datetime.utcnow().date()
+    if (year, month) >= (today.year, today.month):
+        parser.error("only months that have already ended can be closed")
+    report = run_rollover(year, month, args.batch_size)
+    next_year, next_month_number = next_month(year, month)
+    print(
+        f"closed {report.closed} months for {year:04d}-{month:02d}, "
+        f"opened {report.opened} for {next_year:04d}-{next_month_number:02d}, "
+        f"{report.users} users in {report.seconds}s ({report.users_per_sec} users/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
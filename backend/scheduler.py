@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import List
+
+from .db import SessionLocal
+from .logic import generate_task_instances_range
+from .models import TaskTemplate
+from .rollover import previous_month, run_rollover
+
+
+logger = logging.getLogger(__name__)
+
+
+def _enabled() -> bool:
+    return os.getenv("TASK_PREGEN_ENABLED") == "1"
+
+
+def _rollover_enabled() -> bool:
+    return os.getenv("MONTH_ROLLOVER_ENABLED") == "1"
+
+
+def _concurrency() -> int:
+    return max(int(os.getenv("TASK_PREGEN_CONCURRENCY", "2")), 1)
+
+
+def _batch_size() -> int:
+    return max(int(os.getenv("TASK_PREGEN_BATCH_SIZE", "100")), 1)
+
+
+def _run_hour_utc() -> int:
+    return int(os.getenv("TASK_PREGEN_HOUR_UTC", "22")) % 24
+
+
+def _rollover_hour_utc() -> int:
+    return int(os.getenv("MONTH_ROLLOVER_HOUR_UTC", "0")) % 24
+
+
+def _users_with_active_templates(after_user_id: int, limit: int) -> List[int]:
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(TaskTemplate.user_id)
+            .filter(TaskTemplate.active == True, TaskTemplate.user_id > after_user_id)  # noqa: E712
+            .distinct()
+            .order_by(TaskTemplate.user_id)
+            .limit(limit)
+            .all()
+        )
+        return [user_id for (user_id,) in rows]
+    finally:
+        db.close()
+
+
+def _generate_for_user(user_id: int, start_date, end_date) -> int:
+    db = SessionLocal()
+    try:
+        return generate_task_instances_range(db, user_id, start_date, end_date)
+    finally:
+        db.close()
+
+
+async def pregenerate(start_date, end_date) -> int:
+    semaphore = asyncio.Semaphore(_concurrency())
+
+    async def run(user_id: int) -> int:
+        async with semaphore:
+            try:
+                return await asyncio.to_thread(_generate_for_user, user_id, start_date, end_date)
+            except Exception:
+                logger.exception("Task pre-generation failed for user %s", user_id)
+                return 0
+
+    created = 0
+    after_user_id = 0
+    batch_size = _batch_size()
+    while True:
+        user_ids = await asyncio.to_thread(_users_with_active_templates, after_user_id, batch_size)
+        if not user_ids:
+            break
+        created += sum(await asyncio.gather(*(run(user_id) for user_id in user_ids)))
+        after_user_id = user_ids[-1]
+    return created
+
+
+def _seconds_until_next_run(now: datetime, hour: int) -> float:
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+async def _run_forever() -> None:
+    # Catch-up pass: cover today as well in case the server was down for the last run.
+    today = datetime.utcnow().date()
+    try:
+        created = await pregenerate(today, today + timedelta(days=1))
+        logger.info("Task pre-generation catch-up created %s instances", created)
+    except Exception:
+        logger.exception("Task pre-generation catch-up failed")
+    while True:
+        await asyncio.sleep(_seconds_until_next_run(datetime.utcnow(), _run_hour_utc()))
+        tomorrow = datetime.utcnow().date() + timedelta(days=1)
+        try:
+            created = await pregenerate(tomorrow, tomorrow)
+            logger.info("Task pre-generation for %s created %s instances", tomorrow, created)
+        except Exception:
+            logger.exception("Task pre-generation for %s failed", tomorrow)
+
+
+async def _rollover_forever() -> None:
+    # Runs daily rather than only on the 1st: once the previous month is closed the pass is a
+    # single empty query, and a missed run (server down at midnight) is picked up the next day.
+    while True:
+        year, month = previous_month(datetime.utcnow().date())
+        try:
+            await asyncio.to_thread(run_rollover, year, month)
+        except Exception:
+            logger.exception("Month rollover for %04d-%02d failed", year, month)
+        await asyncio.sleep(_seconds_until_next_run(datetime.utcnow(), _rollover_hour_utc()))
+
+
+def start_scheduler() -> List[asyncio.Task]:
+    # One task per job so a job that dies neither stops nor hides the others at shutdown.
+    jobs = []
+    if _enabled():
+        jobs.append(_run_forever())
+    if _rollover_enabled():
+        jobs.append(_rollover_forever())
+    return [asyncio.create_task(job) for job in jobs]
+
+
+async def stop_scheduler(tasks: List[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    for task, result in zip(tasks, await asyncio.gather(*tasks, return_exceptions=True)):
+        if isinstance(result, Exception):
+            logger.error("Scheduler job %s had stopped with an error", task.get_coro().__name__, exc_info=result)
@@ -79,6 +79,15 @@ class CompleteTaskIn(BaseModel):
     note: str
 
 
+class CompleteTaskBatchItemIn(BaseModel):
+    instance_id: int
+    note: str
+
+
+class CompleteTaskBatchIn(BaseModel):
+    items: List[CompleteTaskBatchItemIn] = Field(min_length=1, max_length=200)
+
+
 class ShopItemIn(BaseModel):
     name: str
     tier: int
@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import uuid
+
+# backend.db builds its engines from DATABASE_URL at import time, so the environment has to be
+# pointed at a scratch database before any backend module is imported.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'app.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.pop("GEMINI_API_KEY", None)
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import pytest  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.coach_cache import coach_cache  # noqa: E402
+from backend.db import create_db_engine, engine as app_engine  # noqa: E402
+from backend.logic import month_state_cache  # noqa: E402
+from backend.migrations import upgrade  # noqa: E402
+from backend.models import Settings, User  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _reset_caches():
+    # User ids restart at 1 in every test database, so process-wide caches must not carry over.
+    month_state_cache.clear()
+    coach_cache.clear()
+    yield
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    upgrade(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def user_id(db) -> int:
+    user = User(email="user@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    db.add(Settings(user_id=user.id))
+    db.commit()
+    return user.id
+
+
+@pytest.fixture(scope="session")
+def app():
+    from backend.main import app
+
+    upgrade(app_engine)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def auth_headers(client) -> dict:
+    # The app database is shared by the session, so every test signs up a fresh user.
+    payload = {"email": f"{uuid.uuid4().hex}@example.com", "password": "secret123"}
+    response = client.post("/auth/signup", json=payload)
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
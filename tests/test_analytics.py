@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pytest
+
+from backend.analytics import build_history
+from backend.models import Month, Purchase, ShopItem
+
+
+@pytest.fixture
+def history_user(db, user_id) -> int:
+    months = [
+        # Closed month with recorded savings and purchases in two categories.
+        Month(user_id=user_id, year=2025, month=11, income=1000.0, ratio=1.0, needs_planned=500.0,
+              savings_planned=300.0, psp_total=200.0, exp_earned=150.0, exp_redeemed=60.0, cash_spent=45.0,
+              savings_actual=350.0),
+        # Nothing earned or bought.
+        Month(user_id=user_id, year=2025, month=12, income=1000.0, ratio=2.0, needs_planned=500.0,
+              savings_planned=300.0, psp_total=200.0),
+        Month(user_id=user_id, year=2026, month=1, income=2000.0, ratio=2.0, needs_planned=1000.0,
+              savings_planned=600.0, psp_total=400.0, exp_earned=80.0, exp_redeemed=30.0, cash_spent=12.5),
+    ]
+    fun = ShopItem(user_id=user_id, name="Cinema", tier=100, exp_cost=25, cash_price=20.0, category="fun")
+    plain = ShopItem(user_id=user_id, name="Socks", tier=100, exp_cost=10, cash_price=10.0)
+    db.add_all([*months, fun, plain])
+    db.flush()
+    at = datetime(2025, 11, 20)
+    db.add_all(
+        [
+            Purchase(user_id=user_id, month_id=months[0].id, item_id=fun.id, exp_spent=25, cash_spent=20.0,
+                     purchased_at=at),
+            Purchase(user_id=user_id, month_id=months[0].id, item_id=fun.id, exp_spent=25, cash_spent=15.0,
+                     purchased_at=at),
+            Purchase(user_id=user_id, month_id=months[0].id, item_id=plain.id, exp_spent=10, cash_spent=10.0,
+                     purchased_at=at),
+            Purchase(user_id=user_id, month_id=months[2].id, item_id=fun.id, exp_spent=30, cash_spent=12.5,
+                     purchased_at=datetime(2026, 1, 5)),
+        ]
+    )
+    db.commit()
+    return user_id
+
+
+def test_history_per_month_totals(db, history_user):
+    history = build_history(db, history_user)
+
+    assert history["months"] == [
+        {
+            "year": 2025, "month": 11, "income": 1000.0, "savings": 350.0, "savings_rate": 0.35,
+            "cumulative_savings": 350.0, "rollover": 50.0, "cash_spent": 45.0,
+            "exp_earned": 150.0, "exp_redeemed": 60.0, "exp_earned_per_day": 5.0, "exp_redeemed_per_day": 2.0,
+            "purchases": 3, "spend_by_category": {"fun": 35.0, "uncategorized": 10.0},
+        },
+        {
+            "year": 2025, "month": 12, "income": 1000.0, "savings": 500.0, "savings_rate": 0.5,
+            "cumulative_savings": 850.0, "rollover": 200.0, "cash_spent": 0.0,
+            "exp_earned": 0.0, "exp_redeemed": 0.0, "exp_earned_per_day": 0.0, "exp_redeemed_per_day": 0.0,
+            "purchases": 0, "spend_by_category": {},
+        },
+        {
+            "year": 2026, "month": 1, "income": 2000.0, "savings": 840.0, "savings_rate": 0.42,
+            "cumulative_savings": 1690.0, "rollover": 240.0, "cash_spent": 12.5,
+            "exp_earned": 80.0, "exp_redeemed": 30.0, "exp_earned_per_day": 2.5806,
+            "exp_redeemed_per_day": 0.9677, "purchases": 1, "spend_by_category": {"fun": 12.5},
+        },
+    ]
+
+
+def test_history_totals(db, history_user):
+    totals = build_history(db, history_user)["totals"]
+
+    assert totals == {
+        "months": 3, "income": 4000.0, "savings": 1690.0, "savings_rate": 0.4225, "rollover": 490.0,
+        "cash_spent": 57.5, "exp_earned": 230.0, "exp_redeemed": 90.0, "exp_earned_per_day": 2.5,
+        "exp_redeemed_per_day": 0.9783, "purchases": 4,
+        "spend_by_category": {
+            "fun": {"cash": 47.5, "exp": 80.0, "purchases": 3},
+            "uncategorized": {"cash": 10.0, "exp": 10.0, "purchases": 1},
+        },
+    }
+
+
+def test_history_limited_to_recent_months(db, history_user):
+    history = build_history(db, history_user, months=2)
+
+    assert [(row["year"], row["month"]) for row in history["months"]] == [(2025, 12), (2026, 1)]
+    assert history["totals"]["purchases"] == 1
+    assert history["totals"]["spend_by_category"] == {"fun": {"cash": 12.5, "exp": 30.0, "purchases": 1}}
+
+
+def test_history_for_user_without_months(db, user_id):
+    history = build_history(db, user_id)
+
+    assert history["months"] == []
+    assert history["totals"]["months"] == 0
+    assert history["totals"]["savings_rate"] == 0.0
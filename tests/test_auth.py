@@ -0,0 +1,33 @@
+from backend.auth import create_access_token, user_cache
+
+
+def _headers(user_id: int) -> dict:
+    token = create_access_token({"sub": str(user_id), "email": "ghost@example.com"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_claims_routes_skip_the_user_lookup(client):
+    headers = _headers(987654)
+
+    assert client.get("/shop/items", headers=headers).json() == []
+    # Routes that write still confirm the user exists.
+    response = client.post(
+        "/shop/item", json={"name": "Headphones", "tier": 100, "cash_price": 5.0}, headers=headers
+    )
+    assert response.status_code == 401
+
+
+def test_claims_routes_reject_bad_tokens(client):
+    headers = {"Authorization": "Bearer not-a-token"}
+
+    assert client.get("/shop/items", headers=headers).status_code == 401
+    assert client.get("/month/state", headers=headers).status_code == 401
+
+
+def test_user_lookup_is_cached(client, auth_headers):
+    client.get("/analytics/history", headers=auth_headers)
+    hits = user_cache.hits
+
+    client.get("/analytics/history", headers=auth_headers)
+
+    assert user_cache.hits == hits + 1
@@ -0,0 +1,62 @@
+import json
+
+
+def test_ndjson_import_reports_bad_rows_and_keeps_good_ones(client, auth_headers):
+    body = "\n".join(
+        [
+            json.dumps({"name": "Book", "tier": 100, "cash_price": 12.5}),
+            "{not json",
+            json.dumps({"name": "Game", "tier": 150, "cash_price": -1}),
+            "",
+            json.dumps(["not", "an", "object"]),
+            json.dumps({"name": "Film", "tier": 100, "cash_price": 8.0, "category": "fun"}),
+        ]
+    )
+
+    response = client.post(
+        "/shop/items/import",
+        content=body.encode("utf-8"),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["imported"], result["rejected"]) == (2, 3)
+    assert [error["row"] for error in result["errors"]] == [2, 3, 5]
+    assert [item["name"] for item in client.get("/shop/items", headers=auth_headers).json()] == ["Book", "Film"]
+
+
+def test_csv_import_handles_quoted_newlines_and_defaults(client, auth_headers):
+    body = (
+        'title,difficulty,schedule_type,category,exp_value\r\n'
+        'Stretch,easy,daily,,\r\n'
+        '"Write\nreport",hard,daily,work,\r\n'
+        'Nap,easy,daily,,lots\r\n'
+    )
+
+    response = client.post(
+        "/tasks/templates/import",
+        content=body.encode("utf-8"),
+        headers={**auth_headers, "Content-Type": "text/csv"},
+    )
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["imported"], result["rejected"]) == (2, 1)
+    assert result["errors"][0]["row"] == 3
+    assert result["errors"][0]["error"].startswith("Input should be a valid integer")
+
+
+def test_export_streams_imported_rows_as_ndjson(client, auth_headers):
+    client.post(
+        "/shop/items/import",
+        content=json.dumps({"name": "Book", "tier": 100, "cash_price": 12.5}).encode("utf-8"),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+    )
+
+    response = client.get("/export", headers=auth_headers)
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    items = [record for record in records if record["type"] == "shop_item"]
+    assert [(item["name"], item["cash_price"]) for item in items] == [("Book", 12.5)]
+    assert all("user_id" not in record for record in records)
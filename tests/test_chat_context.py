@@ -0,0 +1,101 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from backend import metrics
+from backend.logic import build_chat_context, month_state_cache
+from backend.models import Month, ShopItem, TaskInstance, TaskTemplate
+
+
+def _seed(db, user_id: int, tasks: int) -> str:
+    today = datetime.utcnow().date()
+    db.add(
+        Month(
+            user_id=user_id,
+            year=today.year,
+            month=today.month,
+            income=1000.0,
+            ratio=1.0,
+            needs_planned=500.0,
+            savings_planned=300.0,
+            psp_total=200.0,
+        )
+    )
+    db.add_all(
+        ShopItem(user_id=user_id, name=f"Item {number}", tier=100, exp_cost=100, cash_price=5.0) for number in range(8)
+    )
+    template_ids = []
+    for number in range(tasks):
+        template = TaskTemplate(
+            user_id=user_id, title=f"Task {number}", difficulty="easy", exp_value=5, schedule_type="daily"
+        )
+        db.add(template)
+        db.flush()
+        template_ids.append(template.id)
+    db.execute(
+        insert(TaskInstance),
+        [
+            {
+                "user_id": user_id,
+                "template_id": template_id,
+                "date": today.isoformat(),
+                "status": "completed" if number % 3 == 0 else "pending",
+            }
+            for number, template_id in enumerate(template_ids)
+        ],
+    )
+    db.commit()
+    return today.isoformat()
+
+
+def _queries(db, user_id: int) -> tuple:
+    timings = metrics.RequestTimings()
+    token = metrics._current.set(timings)
+    try:
+        context = build_chat_context(db, user_id)
+    finally:
+        metrics._current.reset(token)
+    db.expunge_all()
+    return timings.db_queries, context
+
+
+@pytest.mark.parametrize("tasks", [3, 200])
+def test_query_count_does_not_grow_with_tasks(db, user_id, tasks):
+    _seed(db, user_id, tasks)
+    db.expunge_all()
+
+    cold, context = _queries(db, user_id)
+    warm, _context = _queries(db, user_id)
+
+    assert (cold, warm) == (5, 4)
+    assert context["task_summary"]["pending_today"] + context["task_summary"]["completed_today"] == tasks
+    assert len(context["task_summary"]["next_tasks"]) == min(3, context["task_summary"]["pending_today"])
+    assert len(context["shop_summary"]["suggested_items"]) == 5
+
+
+def test_month_snapshot_is_cached_between_calls(db, user_id):
+    _seed(db, user_id, 3)
+    today = datetime.utcnow().date()
+
+    build_chat_context(db, user_id)
+
+    assert month_state_cache.get(user_id, today.year, today.month) is not None
+
+
+def _server_timing_queries(response) -> int:
+    db_part = next(part for part in response.headers["server-timing"].split(", ") if part.startswith("db;"))
+    return int(db_part.split('desc="')[1].split()[0])
+
+
+def test_chat_context_endpoint_query_count(client, auth_headers, monkeypatch):
+    monkeypatch.setenv("DEBUG_CHAT_CONTEXT", "1")
+    assert client.post("/month/start", json={"income": 1000, "ratio": 1}, headers=auth_headers).status_code == 200
+
+    # /month/start warmed the user cache; the cold request also loads the Month, the warm one
+    # reads it from the snapshot cache.
+    cold = client.get("/chat/context", headers=auth_headers)
+    warm = client.get("/chat/context", headers=auth_headers)
+
+    assert cold.status_code == warm.status_code == 200
+    assert (_server_timing_queries(cold), _server_timing_queries(warm)) == (5, 4)
@@ -0,0 +1,40 @@
+import asyncio
+
+from backend.coach_cache import _CoachCache
+
+
+def _rows(cache) -> list:
+    return [row[0] for row in cache._db.execute("SELECT key FROM coach_cache ORDER BY key")]
+
+
+def test_invalidate_user_drops_memory_and_disk_entries(tmp_path):
+    cache = _CoachCache(max_size=8, ttl_seconds=60, db_path=str(tmp_path / "coach.db"))
+
+    async def run():
+        await cache.put("a", 1, "Buy it.", 120.0)
+        await cache.put("b", 2, "Wait a week.", 80.0)
+        await cache.invalidate_user(1)
+        return await cache.get("a"), await cache.get("b")
+
+    assert asyncio.run(run()) == (None, "Wait a week.")
+    assert _rows(cache) == ["b"]
+
+
+def test_writes_prune_expired_rows(tmp_path):
+    cache = _CoachCache(max_size=8, ttl_seconds=-1, db_path=str(tmp_path / "coach.db"))
+
+    async def run():
+        await cache.put("stale", 1, "Old advice.", 100.0)
+        cache.ttl_seconds = 60
+        await cache.put("fresh", 1, "New advice.", 100.0)
+
+    asyncio.run(run())
+    assert _rows(cache) == ["fresh"]
+
+
+def test_key_ignores_message_spacing_and_case():
+    cache = _CoachCache(max_size=8, ttl_seconds=60, db_path=None)
+    context = {"month": {"exp_available": 40}}
+
+    assert cache.key(1, context, "Can I  buy it?") == cache.key(1, context, "can i buy it?")
+    assert cache.key(1, context, "Can I buy it?") != cache.key(2, context, "Can I buy it?")
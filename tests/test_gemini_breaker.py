@@ -0,0 +1,184 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from backend import gemini
+
+CONTEXT = {"month_state": {"cash_available": 42.5, "exp_available": 30}, "task_summary": {"pending_today": 2}}
+PROMPT = f"APP_CONTEXT:\n{json.dumps(CONTEXT)}\nUSER_MESSAGE:\nShould I buy it?"
+OFFLINE = gemini._offline_response(PROMPT)
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    monkeypatch.setenv("GEMINI_BREAKER_WINDOW", "10")
+    monkeypatch.setenv("GEMINI_BREAKER_MIN_CALLS", "3")
+    monkeypatch.setenv("GEMINI_BREAKER_FAILURE_RATE", "0.5")
+    monkeypatch.setenv("GEMINI_BREAKER_SLOW_MS", "100")
+    monkeypatch.setenv("GEMINI_BREAKER_COOLDOWN", "0.05")
+    breaker = gemini._build_breaker()
+    monkeypatch.setattr(gemini, "breaker", breaker)
+    return breaker
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    # Replies are queued per test; each entry is (status, delay_seconds).
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.delenv("GEMINI_LATENCY_BUDGET_MS", raising=False)
+    state = {"replies": [], "calls": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        state["calls"] += 1
+        status, delay = state["replies"].pop(0) if state["replies"] else (200, 0)
+        await asyncio.sleep(delay)
+        if "streamGenerateContent" in request.url.path:
+            chunk = {"candidates": [{"content": {"parts": [{"text": "Upstream advice."}]}}]}
+            return httpx.Response(status, content=f"data: {json.dumps(chunk)}\r\n\r\n".encode("utf-8"))
+        body = {"candidates": [{"content": {"parts": [{"text": "Upstream advice."}]}}]}
+        return httpx.Response(status, json=body)
+
+    def run(coro_factory):
+        async def wrapper():
+            monkeypatch.setattr(gemini, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+            monkeypatch.setattr(gemini, "_semaphore", asyncio.Semaphore(4))
+            try:
+                return await coro_factory()
+            finally:
+                await gemini._client.aclose()
+
+        return asyncio.run(wrapper())
+
+    state["run"] = run
+    return state
+
+
+async def _stream(prompt: str) -> str:
+    return "".join([text async for text in gemini.gemini_chat_stream(prompt)])
+
+
+def test_opens_on_failure_rate_and_short_circuits(breaker):
+    for ok in (True, False, False):
+        breaker.record(ok, 10.0)
+
+    assert breaker.state == "open"
+    assert breaker.allow() is False
+    assert breaker.stats()["short_circuited"] == 1
+
+
+def test_opens_on_slow_p95(breaker):
+    for latency in (20.0, 30.0, 500.0):
+        breaker.record(True, latency)
+
+    assert breaker.state == "open"
+
+
+def test_stays_closed_below_min_calls(breaker):
+    breaker.record(False, 10.0)
+    breaker.record(False, 10.0)
+
+    assert breaker.state == "closed"
+    assert breaker.allow() is True
+
+
+def test_half_open_lets_one_probe_through(breaker):
+    for _ in range(3):
+        breaker.record(False, 10.0)
+    time.sleep(0.06)
+
+    assert breaker.allow() is True
+    assert breaker.state == "half_open"
+    assert breaker.allow() is False
+    breaker.record(True, 10.0)
+    assert breaker.state == "closed"
+    assert breaker.stats()["window_calls"] == 0
+
+
+@pytest.mark.parametrize("ok, latency", [(False, 10.0), (True, 500.0)])
+def test_failed_or_slow_probe_reopens(breaker, ok, latency):
+    for _ in range(3):
+        breaker.record(False, 10.0)
+    time.sleep(0.06)
+    assert breaker.allow() is True
+
+    breaker.record(ok, latency)
+
+    assert breaker.state == "open"
+    assert breaker.allow() is False
+
+
+def test_abandoned_probe_can_be_retried_at_once(breaker):
+    for _ in range(3):
+        breaker.record(False, 10.0)
+    time.sleep(0.06)
+    assert breaker.allow() is True
+
+    breaker.abandon()
+
+    assert breaker.state == "open"
+    assert breaker.allow() is True
+
+
+def test_upstream_errors_open_the_breaker(breaker, upstream):
+    upstream["replies"] = [(500, 0)] * 3
+
+    async def calls():
+        return [await gemini.gemini_chat(PROMPT) for _ in range(5)]
+
+    replies = upstream["run"](calls)
+
+    assert replies[:3] == [gemini.FALLBACK_RESPONSE] * 3
+    # Open: answered locally without reaching upstream.
+    assert replies[3:] == [OFFLINE, OFFLINE]
+    assert upstream["calls"] == 3
+    assert breaker.stats()["short_circuited"] == 2
+
+
+def test_half_open_probe_closes_after_recovery(breaker, upstream):
+    upstream["replies"] = [(500, 0)] * 3
+
+    async def calls():
+        for _ in range(3):
+            await gemini.gemini_chat(PROMPT)
+        await asyncio.sleep(0.06)
+        return await gemini.gemini_chat(PROMPT)
+
+    assert upstream["run"](calls) == "Upstream advice."
+    assert breaker.state == "closed"
+
+
+def test_latency_budget_falls_back_to_offline_answer(breaker, upstream, monkeypatch):
+    monkeypatch.setenv("GEMINI_LATENCY_BUDGET_MS", "50")
+    upstream["replies"] = [(200, 0.5)]
+
+    started = time.perf_counter()
+    reply = upstream["run"](lambda: gemini.gemini_chat(PROMPT))
+
+    assert reply == OFFLINE
+    assert time.perf_counter() - started < 0.4
+    assert breaker.stats()["failure_rate"] == 1.0
+
+
+def test_stream_latency_budget_covers_first_token(breaker, upstream, monkeypatch):
+    monkeypatch.setenv("GEMINI_LATENCY_BUDGET_MS", "50")
+    upstream["replies"] = [(200, 0.5), (200, 0)]
+
+    async def calls():
+        return await _stream(PROMPT), await _stream(PROMPT)
+
+    slow, fast = upstream["run"](calls)
+
+    assert slow == OFFLINE
+    assert fast == "Upstream advice."
+    assert breaker.stats()["window_calls"] == 2
+
+
+def test_open_breaker_short_circuits_streams(breaker, upstream):
+    for _ in range(3):
+        breaker.record(False, 10.0)
+
+    assert upstream["run"](lambda: _stream(PROMPT)) == OFFLINE
+    assert upstream["calls"] == 0
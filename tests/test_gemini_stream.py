@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import httpx
+
+from backend import gemini
+from backend.coach_cache import coach_cache
+from backend.main import _coach_event_stream
+
+PROMPT = "APP_CONTEXT: {}\nUSER: Can I afford the headphones?"
+
+SSE_CHUNKS = [
+    {"candidates": [{"content": {"parts": [{"text": "Yes, "}], "role": "model"}}]},
+    {"candidates": [{"content": {"parts": [{"text": "within budget."}], "role": "model"}}]},
+    # Gemini closes the stream with a chunk that has no content.parts.
+    {
+        "candidates": [{"finishReason": "STOP"}],
+        "usageMetadata": {"promptTokenCount": 12, "candidatesTokenCount": 4, "totalTokenCount": 16},
+    },
+]
+
+
+def _sse_body() -> bytes:
+    return "".join(f"data: {json.dumps(chunk)}\r\n\r\n" for chunk in SSE_CHUNKS).encode("utf-8")
+
+
+def _events(raw: list) -> list:
+    events = []
+    for block in raw:
+        text = block.decode("utf-8") if isinstance(block, bytes) else block
+        name = data = None
+        for line in text.strip().splitlines():
+            if line.startswith("event:"):
+                name = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):])
+        events.append((name, data))
+    return events
+
+
+def test_stream_skips_metadata_only_final_chunk(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert "streamGenerateContent" in request.url.path
+        return httpx.Response(200, content=_sse_body(), headers={"content-type": "text/event-stream"})
+
+    async def run() -> list:
+        monkeypatch.setattr(gemini, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        monkeypatch.setattr(gemini, "_semaphore", asyncio.Semaphore(1))
+        try:
+            raw = [event async for event in _coach_event_stream(PROMPT, user_id=1, cache_key="stream-key")]
+            cached = await coach_cache.get("stream-key")
+        finally:
+            await gemini._client.aclose()
+        return _events(raw), cached
+
+    events, cached = asyncio.run(run())
+
+    names = [name for name, _ in events]
+    assert "error" not in names
+    assert names[-1] == "done"
+    assert [data["text"] for name, data in events if name == "token"] == ["Yes, ", "within budget."]
+    assert cached == "Yes, within budget."
+
+
+def test_chunk_text_ignores_chunks_without_parts():
+    assert gemini._chunk_text(SSE_CHUNKS[-1]) == ""
+    assert gemini._chunk_text({"candidates": []}) == ""
+    assert gemini._chunk_text(SSE_CHUNKS[0]) == "Yes, "
@@ -0,0 +1,38 @@
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from fastapi import HTTPException
+
+from backend.auth import _HashPool, hash_password, verify_password
+
+
+def test_pool_recovers_after_a_worker_dies():
+    pool = _HashPool(workers=1, max_pending=4)
+
+    async def run():
+        executor = pool._acquire()
+        pool._release()
+        # Simulates an OOM-killed worker: the whole executor becomes unusable.
+        with pytest.raises(BrokenProcessPool):
+            await asyncio.get_running_loop().run_in_executor(executor, os._exit, 1)
+        return executor, await pool.run(hash_password, "correct horse")
+
+    try:
+        broken, hashed = asyncio.run(run())
+        assert pool._executor is not broken
+        assert verify_password("correct horse", hashed)
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+def test_pool_rejects_when_queue_is_full():
+    pool = _HashPool(workers=1, max_pending=0)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(pool.run(hash_password, "correct horse"))
+
+    assert exc.value.status_code == 503
+    assert pool.pending == 0
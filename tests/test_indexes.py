@@ -0,0 +1,44 @@
+from sqlalchemy import func, select, text
+
+from backend.models import Month, Purchase, ShopItem, TaskInstance
+
+
+def _plan(engine, query) -> str:
+    sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return "\n".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def test_task_instances_by_user_and_date_use_composite_index(engine):
+    query = select(TaskInstance).where(TaskInstance.user_id == 1, TaskInstance.date == "2026-10-18")
+    assert "USING INDEX ix_task_instances_user_date" in _plan(engine, query)
+
+
+def test_month_lookup_uses_user_month_index(engine):
+    # Served by the uniq_user_month constraint, which SQLite backs with an automatic index.
+    query = select(Month).where(Month.user_id == 1, Month.year == 2026, Month.month == 10)
+    plan = _plan(engine, query)
+    assert "USING INDEX" in plan
+    assert "(user_id=? AND year=? AND month=?)" in plan
+
+
+def test_active_shop_items_use_composite_index(engine):
+    query = select(ShopItem).where(ShopItem.user_id == 1, ShopItem.active.is_(True))
+    assert "USING INDEX ix_shop_items_user_active" in _plan(engine, query)
+
+
+def test_purchase_history_is_covered_by_index(engine):
+    query = (
+        select(
+            Purchase.month_id,
+            Purchase.item_id,
+            func.count(),
+            func.sum(Purchase.cash_spent),
+            func.sum(Purchase.exp_spent),
+        )
+        .where(Purchase.user_id == 1)
+        .group_by(Purchase.month_id, Purchase.item_id)
+    )
+    plan = _plan(engine, query)
+    assert "USING COVERING INDEX ix_purchases_history" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,17 @@
+def test_metrics_endpoint_is_off_by_default(client, monkeypatch):
+    monkeypatch.delenv("METRICS_ENABLED", raising=False)
+
+    response = client.get("/health")
+
+    assert client.get("/metrics").status_code == 404
+    assert response.headers["server-timing"].startswith("total;dur=")
+
+
+def test_metrics_endpoint_reports_routes_when_enabled(client, monkeypatch):
+    monkeypatch.setenv("METRICS_ENABLED", "1")
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in response.text
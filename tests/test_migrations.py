@@ -0,0 +1,29 @@
+from sqlalchemy import inspect
+
+from backend.db import Base, create_db_engine
+from backend.migrations import HEAD, current_version, upgrade
+
+
+def test_head_schema_matches_models(engine):
+    inspector = inspect(engine)
+    with engine.connect() as conn:
+        assert current_version(conn) == HEAD
+    for table in Base.metadata.sorted_tables:
+        assert {col["name"] for col in inspector.get_columns(table.name)} == set(table.columns.keys())
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        assert {index.name for index in table.indexes} <= indexes
+
+
+def test_revision_one_is_the_frozen_baseline(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    try:
+        assert upgrade(engine, target=1) == [1]
+        inspector = inspect(engine)
+        assert "closed_at" not in {col["name"] for col in inspector.get_columns("months")}
+        assert "ix_months_period_user" not in {index["name"] for index in inspector.get_indexes("months")}
+
+        assert upgrade(engine) == list(range(2, HEAD + 1))
+        assert "closed_at" in {col["name"] for col in inspect(engine).get_columns("months")}
+        assert upgrade(engine) == []
+    finally:
+        engine.dispose()
@@ -0,0 +1,63 @@
+from backend.logic import _MonthStateCache
+from backend.models import Month
+
+
+def _month(exp_earned: float) -> Month:
+    return Month(
+        user_id=1,
+        year=2026,
+        month=10,
+        income=1000.0,
+        ratio=1.0,
+        needs_planned=500.0,
+        savings_planned=300.0,
+        psp_total=200.0,
+        cash_spent=0.0,
+        exp_earned=exp_earned,
+        exp_redeemed=0.0,
+    )
+
+
+def test_fill_is_served_until_invalidated():
+    cache = _MonthStateCache(max_size=8, ttl_seconds=60)
+    generation = cache.generation(1)
+    stored = cache.store(1, _month(10.0), generation)
+
+    assert cache.get(1, 2026, 10) == stored
+    assert cache.get(1, 2026, 9) is None
+    cache.invalidate(1)
+    assert cache.get(1, 2026, 10) is None
+
+
+def test_fill_that_raced_a_write_is_dropped():
+    cache = _MonthStateCache(max_size=8, ttl_seconds=60)
+    generation = cache.generation(1)
+    # A write commits and invalidates after the reader loaded the older Month.
+    cache.invalidate(1)
+    cache.store(1, _month(10.0), generation)
+    assert cache.get(1, 2026, 10) is None
+
+    newer = cache.store(1, _month(30.0), cache.generation(1))
+    assert cache.get(1, 2026, 10).state["exp_earned"] == 30.0
+    assert newer.version > generation
+
+
+def test_cache_is_bounded_lru():
+    cache = _MonthStateCache(max_size=2, ttl_seconds=60)
+    for user_id in (1, 2):
+        cache.store(user_id, _month(10.0), cache.generation(user_id))
+    cache.get(1, 2026, 10)
+    cache.store(3, _month(10.0), cache.generation(3))
+
+    assert cache.get(1, 2026, 10) is not None
+    assert cache.get(2, 2026, 10) is None
+    assert cache.get(3, 2026, 10) is not None
+
+
+def test_fill_after_eviction_is_dropped():
+    cache = _MonthStateCache(max_size=1, ttl_seconds=60)
+    generation = cache.generation(1)
+    cache.generation(2)
+    cache.store(1, _month(10.0), generation)
+
+    assert cache.get(1, 2026, 10) is None
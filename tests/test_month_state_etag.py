@@ -0,0 +1,15 @@
+def test_month_state_etag_revalidates_until_a_write(client, auth_headers):
+    assert client.post("/month/start", json={"income": 1000, "ratio": 1}, headers=auth_headers).status_code == 200
+    first = client.get("/month/state", headers=auth_headers)
+    etag = first.headers["etag"]
+
+    cached = client.get("/month/state", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+    assert client.post("/month/start", json={"income": 1200, "ratio": 1}, headers=auth_headers).status_code == 200
+
+    fresh = client.get("/month/state", headers={**auth_headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()["income"] == 1200
+    assert int(fresh.headers["x-state-version"]) > int(first.headers["x-state-version"])
@@ -0,0 +1,46 @@
+def _add_items(client, headers, count: int) -> list:
+    ids = []
+    for number in range(count):
+        response = client.post(
+            "/shop/item",
+            json={"name": f"Item {number}", "tier": 100, "exp_cost": 100, "cash_price": 5.0},
+            headers=headers,
+        )
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+
+def test_list_without_limit_returns_everything(client, auth_headers):
+    ids = _add_items(client, auth_headers, 5)
+
+    response = client.get("/shop/items", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == ids
+    assert "x-next-cursor" not in response.headers
+
+
+def test_cursor_pages_cover_the_list_once(client, auth_headers):
+    ids = _add_items(client, auth_headers, 7)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/shop/items", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        assert len(response.json()) <= 3
+        seen += [item["id"] for item in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    assert seen == ids
+
+
+def test_fields_projection_and_bad_input(client, auth_headers):
+    _add_items(client, auth_headers, 1)
+
+    response = client.get("/shop/items", params={"fields": "name"}, headers=auth_headers)
+    assert list(response.json()[0]) == ["id", "name"]
+    assert client.get("/shop/items", params={"fields": "bogus"}, headers=auth_headers).status_code == 400
+    assert client.get("/shop/items", params={"cursor": "!!"}, headers=auth_headers).status_code == 400
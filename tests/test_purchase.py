@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from backend.logic import purchase_item
+from backend.models import Month, Purchase, ShopItem
+
+
+@pytest.fixture
+def month(db, user_id) -> Month:
+    today = datetime.utcnow().date()
+    month = Month(
+        user_id=user_id,
+        year=today.year,
+        month=today.month,
+        income=1000.0,
+        ratio=1.0,
+        needs_planned=500.0,
+        savings_planned=200.0,
+        psp_total=300.0,
+        exp_earned=100.0,
+    )
+    db.add(month)
+    db.commit()
+    return month
+
+
+def _item(db, user_id: int, exp_cost: int, cash_price: float) -> ShopItem:
+    item = ShopItem(user_id=user_id, name="Headphones", tier=1, exp_cost=exp_cost, cash_price=cash_price)
+    db.add(item)
+    db.commit()
+    return item
+
+
+def test_purchase_updates_balances_as_floats(db, user_id, month):
+    item = _item(db, user_id, exp_cost=40, cash_price=25.5)
+
+    purchase, state = purchase_item(db, user_id, item.id)
+
+    assert purchase.id is not None
+    assert type(month.exp_redeemed) is float and month.exp_redeemed == 40.0
+    assert type(month.cash_spent) is float and month.cash_spent == 25.5
+    assert state["exp_available"] == 60.0
+    assert state["cash_available"] == 74.5
+
+
+def test_purchase_rejects_insufficient_exp(db, user_id, month):
+    item = _item(db, user_id, exp_cost=150, cash_price=10.0)
+
+    with pytest.raises(HTTPException) as exc:
+        purchase_item(db, user_id, item.id)
+
+    assert exc.value.detail == "Not enough EXP available."
+    assert db.query(Purchase).count() == 0
+
+
+def test_purchase_rejects_insufficient_cash(db, user_id, month):
+    item = _item(db, user_id, exp_cost=10, cash_price=150.0)
+
+    with pytest.raises(HTTPException) as exc:
+        purchase_item(db, user_id, item.id)
+
+    assert exc.value.detail == "Not enough unlocked cash available."
+    db.refresh(month)
+    assert month.cash_spent == 0.0
+
+
+def test_second_purchase_is_checked_against_updated_balances(db, user_id, month):
+    item = _item(db, user_id, exp_cost=60, cash_price=10.0)
+    purchase_item(db, user_id, item.id)
+
+    with pytest.raises(HTTPException) as exc:
+        purchase_item(db, user_id, item.id)
+
+    assert exc.value.detail == "Not enough EXP available."
+    assert db.query(Purchase).count() == 1
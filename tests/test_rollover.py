@@ -0,0 +1,72 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from backend import rollover
+from backend.logic import compute_month_state
+from backend.models import Month, User
+
+
+@pytest.fixture
+def month_ids(db, engine, monkeypatch):
+    monkeypatch.setattr(rollover, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    ids = []
+    for number, exp_earned in enumerate([0.0, 40.0, 500.0]):
+        user = User(email=f"user{number}@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        month = Month(
+            user_id=user.id,
+            year=2026,
+            month=9,
+            income=1000.0,
+            ratio=1.5,
+            needs_planned=500.0,
+            savings_planned=200.0,
+            psp_total=300.0,
+            exp_earned=exp_earned,
+        )
+        db.add(month)
+        db.flush()
+        ids.append(month.id)
+    db.commit()
+    return ids
+
+
+def test_rollover_saves_projection_and_opens_next_month(db, month_ids):
+    expected = {
+        month_id: compute_month_state(db.get(Month, month_id))["projected_rollover_to_savings"]
+        for month_id in month_ids
+    }
+
+    report = rollover.run_rollover(2026, 9, batch_size=2)
+
+    assert (report.users, report.closed, report.opened) == (3, 3, 3)
+    db.expire_all()
+    for month_id, projected in expected.items():
+        month = db.get(Month, month_id)
+        assert month.closed_at is not None
+        assert month.savings_actual == projected
+    opened = db.scalars(select(Month).where(Month.year == 2026, Month.month == 10)).all()
+    assert len(opened) == 3
+    assert all((m.income, m.ratio, m.psp_total, m.exp_earned) == (1000.0, 1.5, 300.0, 0.0) for m in opened)
+
+
+def test_rollover_is_idempotent(db, month_ids):
+    rollover.run_rollover(2026, 9, batch_size=2)
+    db.expire_all()
+    saved = {month_id: db.get(Month, month_id).closed_at for month_id in month_ids}
+
+    report = rollover.run_rollover(2026, 9, batch_size=2)
+
+    assert (report.users, report.closed, report.opened) == (0, 0, 0)
+    db.expire_all()
+    assert {month_id: db.get(Month, month_id).closed_at for month_id in month_ids} == saved
+    assert len(db.scalars(select(Month).where(Month.month == 10)).all()) == 3
+
+
+def test_previous_month_wraps_january():
+    assert rollover.previous_month(date(2027, 1, 15)) == (2026, 12)
+    assert rollover.previous_month(date(2026, 10, 18)) == (2026, 9)
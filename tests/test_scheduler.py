@@ -0,0 +1,48 @@
+import asyncio
+
+from backend import scheduler
+
+
+def test_jobs_survive_failures_and_stop_cleanly(monkeypatch):
+    monkeypatch.setenv("TASK_PREGEN_ENABLED", "1")
+    monkeypatch.setenv("MONTH_ROLLOVER_ENABLED", "1")
+    monkeypatch.setattr(scheduler, "_seconds_until_next_run", lambda now, hour: 0.01)
+    calls = {"pregenerate": 0, "rollover": 0}
+
+    async def failing_pregenerate(start_date, end_date):
+        calls["pregenerate"] += 1
+        raise RuntimeError("database is unavailable")
+
+    def failing_rollover(year, month):
+        calls["rollover"] += 1
+        raise RuntimeError("database is unavailable")
+
+    monkeypatch.setattr(scheduler, "pregenerate", failing_pregenerate)
+    monkeypatch.setattr(scheduler, "run_rollover", failing_rollover)
+
+    async def run():
+        tasks = scheduler.start_scheduler()
+        await asyncio.sleep(0.2)
+        alive = [not task.done() for task in tasks]
+        await scheduler.stop_scheduler(tasks)
+        return tasks, alive
+
+    tasks, alive = asyncio.run(run())
+
+    assert alive == [True, True]
+    # The failing catch-up pass is followed by further daily passes.
+    assert calls["pregenerate"] >= 2
+    assert calls["rollover"] >= 2
+    assert all(task.cancelled() for task in tasks)
+
+
+def test_no_jobs_when_disabled(monkeypatch):
+    monkeypatch.delenv("TASK_PREGEN_ENABLED", raising=False)
+    monkeypatch.delenv("MONTH_ROLLOVER_ENABLED", raising=False)
+
+    async def run():
+        tasks = scheduler.start_scheduler()
+        await scheduler.stop_scheduler(tasks)
+        return tasks
+
+    assert asyncio.run(run()) == []
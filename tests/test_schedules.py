@@ -0,0 +1,116 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from backend.logic import _compile_schedule
+from backend.models import TaskTemplate
+
+
+def _template(schedule_type: str, meta=None, raw_meta: str | None = None) -> TaskTemplate:
+    return TaskTemplate(
+        title="Task",
+        difficulty="easy",
+        exp_value=5,
+        schedule_type=schedule_type,
+        schedule_meta=raw_meta if raw_meta is not None else (json.dumps(meta) if meta is not None else None),
+    )
+
+
+def _reference_matches(template: TaskTemplate, target_date: date) -> bool:
+    # The per-call matcher the compiled schedules replaced.
+    meta = {}
+    if template.schedule_meta:
+        try:
+            meta = json.loads(template.schedule_meta)
+        except json.JSONDecodeError:
+            meta = {}
+    if template.schedule_type == "daily":
+        return True
+    if template.schedule_type == "one_time":
+        return meta.get("date") == target_date.strftime("%Y-%m-%d")
+    if template.schedule_type == "weekly":
+        weekdays = meta.get("weekdays", [])
+        return target_date.strftime("%A").lower() in [d.lower() for d in weekdays]
+    if template.schedule_type == "monthly":
+        return meta.get("day") == target_date.day
+    return False
+
+
+TEMPLATES = [
+    _template("daily"),
+    _template("one_time", {"date": "2026-02-14"}),
+    _template("one_time", {}),
+    _template("weekly", {"weekdays": ["Monday", "wednesday", "FRIDAY"]}),
+    _template("weekly", {"weekdays": ["sunday"]}),
+    _template("weekly", {"weekdays": []}),
+    _template("monthly", {"day": 1}),
+    _template("monthly", {"day": 31}),
+    _template("monthly", {"day": "15"}),
+    _template("daily", raw_meta="{not json"),
+    _template("weekly", raw_meta="{not json"),
+    _template("fortnightly", {"weekdays": ["monday"]}),
+]
+
+
+@pytest.mark.parametrize("template", TEMPLATES, ids=lambda t: f"{t.schedule_type}:{t.schedule_meta}")
+def test_compiled_schedule_matches_reference(template):
+    matches = _compile_schedule(template)
+    day = date(2026, 1, 1)
+    while day < date(2026, 4, 1):
+        assert matches(day) == _reference_matches(template, day), day
+        day += timedelta(days=1)
+
+
+@pytest.mark.parametrize(
+    "schedule_type, meta, target, expected",
+    [
+        ("daily", None, date(2026, 3, 7), True),
+        ("one_time", {"date": "2026-02-14"}, date(2026, 2, 14), True),
+        ("one_time", {"date": "2026-02-14"}, date(2026, 2, 15), False),
+        ("weekly", {"weekdays": ["Monday", "friday"]}, date(2026, 3, 2), True),
+        ("weekly", {"weekdays": ["Monday", "friday"]}, date(2026, 3, 6), True),
+        ("weekly", {"weekdays": ["Monday", "friday"]}, date(2026, 3, 3), False),
+        ("weekly", {"weekdays": ["sunday"]}, date(2026, 3, 8), True),
+        ("weekly", {"weekdays": ["funday"]}, date(2026, 3, 8), False),
+        ("monthly", {"day": 31}, date(2026, 1, 31), True),
+        ("monthly", {"day": 31}, date(2026, 2, 28), False),
+        ("monthly", {"day": 1}, date(2026, 3, 1), True),
+        ("unknown", None, date(2026, 3, 1), False),
+    ],
+)
+def test_compiled_schedule_cases(schedule_type, meta, target, expected):
+    assert _compile_schedule(_template(schedule_type, meta))(target) is expected
+
+
+def _add_daily_template(client, headers) -> None:
+    response = client.post(
+        "/tasks/template", json={"title": "Stretch", "difficulty": "easy", "schedule_type": "daily"}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+
+
+def test_generate_range_creates_each_day_once(client, auth_headers):
+    _add_daily_template(client, auth_headers)
+    params = {"start": "2026-01-01", "end": "2026-01-31"}
+
+    first = client.post("/tasks/generate_range", params=params, headers=auth_headers)
+    second = client.post("/tasks/generate_range", params=params, headers=auth_headers)
+
+    assert first.status_code == second.status_code == 200
+    assert (first.json()["created"], second.json()["created"]) == (31, 0)
+
+
+@pytest.mark.parametrize(
+    "start, end, detail",
+    [
+        ("2026-01-01", "2026-02-01", "Date range cannot exceed 31 days."),
+        ("2026-01-10", "2026-01-09", "End date must not be before start date."),
+        ("2026-01-01", "01/10/2026", "Invalid date format. Use YYYY-MM-DD."),
+    ],
+)
+def test_generate_range_rejects_bad_ranges(client, auth_headers, start, end, detail):
+    response = client.post("/tasks/generate_range", params={"start": start, "end": end}, headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
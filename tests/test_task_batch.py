@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from backend.logic import complete_task_instances_batch
+from backend.models import Month, TaskInstance, TaskTemplate
+
+NOTE = "finished and logged"
+
+
+@pytest.fixture
+def instance_ids(db, user_id):
+    today = datetime.utcnow().date()
+    # psp_total / ratio puts the month's EXP cap at 20.
+    db.add(
+        Month(
+            user_id=user_id,
+            year=today.year,
+            month=today.month,
+            income=1000.0,
+            ratio=1.0,
+            needs_planned=500.0,
+            savings_planned=480.0,
+            psp_total=20.0,
+        )
+    )
+    ids = []
+    for number in range(4):
+        template = TaskTemplate(
+            user_id=user_id,
+            title=f"Task {number}",
+            difficulty="medium",
+            exp_value=8,
+            schedule_type="daily",
+        )
+        db.add(template)
+        db.flush()
+        instance = TaskInstance(user_id=user_id, template_id=template.id, date=today.isoformat())
+        db.add(instance)
+        db.flush()
+        ids.append(instance.id)
+    db.commit()
+    return ids
+
+
+def test_batch_awards_exp_up_to_cap_in_request_order(db, user_id, instance_ids):
+    results, state = complete_task_instances_batch(db, user_id, [(i, NOTE) for i in instance_ids])
+
+    assert [result["awarded_exp"] for result in results] == [8.0, 8.0, 4.0, 0.0]
+    assert all(result["status"] == "completed" for result in results)
+    assert state["exp_cap"] == 20.0
+    assert state["exp_earned"] == 20.0
+
+
+def test_batch_rejects_duplicates_without_changes(db, user_id, instance_ids):
+    first = instance_ids[0]
+    with pytest.raises(HTTPException) as exc:
+        complete_task_instances_batch(db, user_id, [(first, NOTE), (first, NOTE)])
+
+    assert exc.value.status_code == 400
+    assert db.get(TaskInstance, first).status == "pending"
+
+
+def test_batch_rejects_short_notes(db, user_id, instance_ids):
+    with pytest.raises(HTTPException) as exc:
+        complete_task_instances_batch(db, user_id, [(instance_ids[0], NOTE), (instance_ids[1], "done")])
+
+    assert exc.value.detail == "Completion note must be at least 8 characters."
@@ -0,0 +1,72 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import false
+
+from backend.logic import generate_task_instances
+from backend.models import TaskInstance, TaskTemplate
+
+TARGET = date(2026, 3, 2)
+
+
+@pytest.fixture
+def template_ids(db, user_id) -> list:
+    templates = [
+        TaskTemplate(user_id=user_id, title=f"Task {number}", difficulty="easy", exp_value=5, schedule_type="daily")
+        for number in range(4)
+    ]
+    templates.append(
+        TaskTemplate(
+            user_id=user_id, title="Inactive", difficulty="easy", exp_value=5, schedule_type="daily", active=False
+        )
+    )
+    db.add_all(templates)
+    db.commit()
+    return [template.id for template in templates[:4]]
+
+
+def _instances(db, user_id: int) -> list:
+    return sorted(
+        template_id
+        for (template_id,) in db.query(TaskInstance.template_id).filter(
+            TaskInstance.user_id == user_id, TaskInstance.date == TARGET.isoformat()
+        )
+    )
+
+
+def test_generating_twice_creates_nothing_the_second_time(db, user_id, template_ids):
+    assert generate_task_instances(db, user_id, TARGET) == 4
+    assert generate_task_instances(db, user_id, TARGET) == 0
+    assert _instances(db, user_id) == template_ids
+
+
+def test_only_missing_instances_are_counted(db, user_id, template_ids):
+    db.add_all(
+        TaskInstance(user_id=user_id, template_id=template_id, date=TARGET.isoformat(), status="completed")
+        for template_id in template_ids[:2]
+    )
+    db.commit()
+
+    assert generate_task_instances(db, user_id, TARGET) == 2
+    assert _instances(db, user_id) == template_ids
+    statuses = dict(db.query(TaskInstance.template_id, TaskInstance.status).filter(TaskInstance.user_id == user_id))
+    assert [statuses[template_id] for template_id in template_ids] == ["completed", "completed", "pending", "pending"]
+
+
+def test_conflicting_rows_are_skipped_by_the_insert(db, user_id, template_ids, monkeypatch):
+    # Another request inserted rows after this one read the existing set: the constraint
+    # absorbs them and they are not counted.
+    db.add(TaskInstance(user_id=user_id, template_id=template_ids[0], date=TARGET.isoformat(), status="pending"))
+    db.commit()
+    original = db.query
+
+    def query_hiding_existing(*entities):
+        query = original(*entities)
+        if len(entities) == 2 and entities[0] is TaskInstance.template_id and entities[1] is TaskInstance.date:
+            return query.filter(false())
+        return query
+
+    monkeypatch.setattr(db, "query", query_hiding_existing)
+
+    assert generate_task_instances(db, user_id, TARGET) == 3
+    assert _instances(db, user_id) == template_ids
@@ -0,0 +1,60 @@
+from backend.ttl_cache import TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = _Clock()
+    cache = TTLCache(max_size=4, ttl_seconds=10, clock=clock)
+    cache.put("a", 1)
+
+    clock.now = 10
+    assert cache.get("a") == 1
+    clock.now = 10.5
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_zero_size_stores_nothing():
+    cache = TTLCache(max_size=0, ttl_seconds=60)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+
+def test_unrecorded_lookups_and_pop_where():
+    cache = TTLCache(max_size=4, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+
+    assert cache.get("a", record=False) == 1
+    assert cache.pop_where(lambda value: value % 2 == 1) == 2
+    assert cache.get("b") == 2
+    assert cache.get("a") is None
+    assert cache.stats() == {
+        "size": 1,
+        "max_size": 4,
+        "ttl_seconds": 60,
+        "hits": 1,
+        "misses": 1,
+        "hit_rate": 0.5,
+    }